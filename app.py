@@ -1,24 +1,106 @@
 # main.py
 
-import requests
-from bs4 import BeautifulSoup
-from fastapi import FastAPI, HTTPException, Path, Query # MODIFIED: Added Query
+import httpx
+from bs4 import BeautifulSoup, SoupStrainer
+from lxml import etree, html as lxml_html
+from fastapi import Depends, FastAPI, Header, HTTPException, Path, Query, Request, Response # MODIFIED: Added Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from pydantic import BaseModel, Field 
-from typing import List, Optional, Any # Dict removed as not directly used by models here
-from urllib.parse import quote 
+from typing import Annotated, Awaitable, Callable, Dict, List, NamedTuple, Optional, Any, Type, TypeVar
+from urllib.parse import quote, urljoin
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from concurrent.futures import ThreadPoolExecutor
+from cachetools import Cache, TLRUCache, TTLCache
+import asyncio
+import copy
+import functools
+import hashlib
+import hmac
+import inspect
+import io
 import logging
+import os
 import re # ADDED: For the new /scrape endpoint logic
 
+from etags import etag_matches
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 # --- FastAPI App Setup ---
-# Enable docs at /docs and /redoc automatically
-app = FastAPI(title="Consolidated HQPORN Scraper API")
+# Shared async HTTP client, opened on startup and closed on shutdown (see lifespan below)
+ASYNC_CLIENT: Optional[httpx.AsyncClient] = None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Creates the pooled HTTP/2 client used by every scraper so concurrent requests overlap their network I/O."""
+    global ASYNC_CLIENT
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=PARSE_WORKERS))
+    # Accept-Encoding is left to httpx: it advertises gzip/deflate, plus br when the brotli extra is installed,
+    # so the site is never offered an encoding we can't decode
+    ASYNC_CLIENT = httpx.AsyncClient(
+        headers=HEADERS,
+        timeout=15,
+        follow_redirects=True, # Match the old requests.get behaviour
+        transport=httpx.AsyncHTTPTransport(
+            http2=True,
+            retries=2, # Retries failed connection attempts only
+            # Idle connections stay open for a minute (httpx default: 5s), so bursts spaced out by a few
+            # seconds don't pay DNS + TLS handshakes again
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=20, keepalive_expiry=60),
+        ),
+    )
+    try:
+        # Best-effort warmup so the first real request doesn't pay DNS, TCP and TLS setup in this worker
+        await ASYNC_CLIENT.head(f"{BASE_URL}/", timeout=5)
+    except httpx.HTTPError as e:
+        logger.warning("Warmup request to %s failed: %s", BASE_URL, e)
+    try:
+        yield
+    finally:
+        await ASYNC_CLIENT.aclose()
 
-# Add CORS middleware to allow cross-origin requests from anywhere
+# Enable docs at /docs and /redoc automatically
+app = FastAPI(title="Consolidated HQPORN Scraper API", lifespan=lifespan)
+
+@app.middleware("http")
+async def serve_cached_responses(request: Request, call_next):
+    """Keeps the serialized body of successful GET /api responses in RESPONSE_CACHE, so repeat requests skip the
+    handler and JSON encoding entirely. Adds Cache-Control and an ETag, and answers a matching If-None-Match
+    with 304 so revalidations skip the body as well.
+    A body expires together with the earliest cached scrape result it was built from, and max-age counts down
+    to that moment, so neither this cache nor clients keep it past the data underneath."""
+    path = request.url.path
+    if request.method != "GET" or not path.startswith("/api/"):
+        return await call_next(request)
+
+    key = f"{path}?{request.url.query}"
+    cached = RESPONSE_CACHE.get(key)
+    if cached is None:
+        expiry = [RESPONSE_CACHE.timer() + cache_max_age(path)] # Lowered by ttl_cached while the handler runs
+        RESPONSE_EXPIRY.set(expiry)
+        response = await call_next(request)
+        if response.status_code != 200:
+            return response
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        etag = f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+        cached = RESPONSE_CACHE[key] = (etag, body, response.media_type or response.headers.get("content-type"), expiry[0])
+
+    etag, body, media_type, expires = cached
+    max_age = max(0, int(expires - RESPONSE_CACHE.timer()))
+    cache_headers = {"ETag": etag, "Cache-Control": f"public, max-age={max_age}"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=cache_headers)
+    return Response(content=body, media_type=media_type, headers=cache_headers)
+
+# Add CORS middleware to allow cross-origin requests from anywhere. Added after the response cache so it wraps it:
+# CORS headers are computed for each request's own Origin and never stored with a cached body
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"], # Allows all origins
@@ -27,13 +109,156 @@ app.add_middleware(
     allow_headers=["*"], # Allows all headers
 )
 
+# Wraps everything above: list payloads repeat the same URL prefixes and shrink several-fold
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=4)
+
+class HeadAsGet:
+    """Serves HEAD /api requests as the GET they mirror, minus the body. The rest of the stack (response cache,
+    CORS, gzip, routing) sees a GET on a copy of the scope, so HEAD gets exactly the headers GET would send,
+    Content-Encoding and Content-Length included; only the body bytes are dropped on the way out."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "HEAD" or not scope["path"].startswith("/api/"):
+            return await self.app(scope, receive, send)
+
+        async def send_without_body(message: Message) -> None:
+            if message["type"] == "http.response.body":
+                message = {**message, "body": b""}
+            await send(message)
+
+        await self.app({**scope, "method": "GET"}, receive, send_without_body)
+
+# Added last so it is the outermost layer, outside gzip
+app.add_middleware(HeadAsGet)
+
 # --- Constants ---
 BASE_URL = "https://hqporn.xxx"
 # Define standard headers once to avoid repetition
-HEADERS = {
-    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+HEADERS = { # Set once on ASYNC_CLIENT, so no request builds its own header dict
+    "User-Agent": USER_AGENT,
+    "Accept": "text/html,application/xhtml+xml", # Every fetch is an HTML page
 }
 
+# Shared secret for the admin endpoints (sent as X-Admin-Token); they are disabled when it is unset
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+
+# Upper bounds for the batch endpoints, so one request can't flood the site
+MAX_BATCH_PAGES = 20
+MAX_BATCH_CONCURRENCY = 10
+
+# Upstream fetch tuning
+FETCH_RETRIES = 2
+RETRY_STATUSES = frozenset({502, 503, 504})
+RETRY_BACKOFF = 0.3 # Seconds before the first retry, doubled for each further one
+PARSE_WORKERS = 32 # Threads available to asyncio.to_thread for HTML parsing
+
+# Seconds a result stays in our caches, and in clients/proxies through Cache-Control
+PAGE_TTL = 300 # Listing and search pages only change on the order of minutes
+TREND_TTL = 60 # Trending moves fastest
+CATEGORY_TTL = 3600 # The category list hardly ever changes
+STREAM_TTL = 3600 # Stream data for a single video page is close to static
+NEGATIVE_TTL = 120 # Short, so content that appears later is picked up soon
+
+def page_expiry(key: tuple, value: Any, now: float) -> float:
+    """Per-entry expiry for PAGE_CACHE. Keys are (scraper name, *bound arguments), as built by ttl_cached."""
+    if key[0] == "scrape_category_list_page":
+        return now + CATEGORY_TTL
+    if ("section", "trend") in key:
+        return now + TREND_TTL
+    return now + PAGE_TTL
+
+def cache_max_age(path: str) -> int:
+    """Longest Cache-Control max-age for a successful /api response, matching how long our caches keep its data."""
+    if path.startswith("/api/stream/"):
+        return STREAM_TTL
+    if path.startswith("/api/trend/"):
+        return TREND_TTL
+    if path.startswith("/api/categories/"):
+        return CATEGORY_TTL
+    return PAGE_TTL
+
+# Path parameter shared by every paginated endpoint; FastAPI rejects values <= 0 with a 422 before the handler runs,
+# so the scrapers below don't re-check it
+PageNumber = Annotated[int, Path(description="Page number (>0)", gt=0)]
+
+# Serialized /api responses, keyed by path + query string: (ETag, body, media type, expiry time)
+RESPONSE_CACHE: TLRUCache = TLRUCache(maxsize=512, ttu=lambda key, value, now: value[3])
+# Earliest expiry of the cached results used by the request being handled, as a one-item list: set by
+# serve_cached_responses, lowered by ttl_cached from inside the handler
+RESPONSE_EXPIRY: ContextVar[Optional[List[float]]] = ContextVar("RESPONSE_EXPIRY", default=None)
+# Parsed results of listing pages. PAGE_CACHE and STREAM_CACHE entries are (expiry time, result), see ttl_cached
+PAGE_CACHE: TLRUCache = TLRUCache(maxsize=512, ttu=page_expiry)
+STREAM_CACHE: TTLCache = TTLCache(maxsize=512, ttl=STREAM_TTL)
+# 404s (e.g. a video page without a player), so repeated requests for missing content don't hit the site.
+# Empty listings need no entry here: they are cached like any other result.
+NEGATIVE_CACHE: TTLCache = TTLCache(maxsize=256, ttl=NEGATIVE_TTL)
+# Scrapes currently running, by cache key, so concurrent identical requests await the same one
+IN_FLIGHT: Dict[tuple, "asyncio.Future[Any]"] = {}
+
+class AnyOfStrainer(SoupStrainer):
+    """Keeps the elements matched by any of `strainers`, with everything inside them. One SoupStrainer
+    ANDs its name and attribute rules, so alternatives with different attributes need one strainer each."""
+
+    def __init__(self, *strainers: SoupStrainer):
+        super().__init__()
+        self.strainers = strainers
+
+    def allow_tag_creation(self, nsprefix: Optional[str], name: str, attrs: Optional[Dict[str, str]]) -> bool:
+        return any(strainer.allow_tag_creation(nsprefix, name, attrs) for strainer in self.strainers)
+
+    def allow_string_creation(self, string: str) -> bool:
+        return False # Text outside the kept elements is never read
+
+# Video pages only need the player div and any <video> outside it, where video#video_html5_api may sit (with
+# their <source> children); everything else is skipped while parsing. The class is still the raw attribute string at that point,
+# so the player div is matched by a class-token regex.
+VIDEO_STRAINER = AnyOfStrainer(
+    SoupStrainer('div', class_=re.compile(r'(?:^|\s)b-video-player(?:\s|$)')), SoupStrainer('video'))
+
+# --- Precompiled XPath Selectors ---
+# Compiled once at import so listing pages are walked in C by libxml2 rather than by BeautifulSoup.
+
+def has_class(class_name: str) -> str:
+    """XPath predicate matching elements whose class attribute contains `class_name` as a whole token."""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')"
+
+CATEGORY_LIST_XPATH = etree.XPath(f"//div[@id='galleries'][{has_class('js-category-list')}]")
+PORNSTAR_LIST_XPATH = etree.XPath(f"//div[@id='galleries'][{has_class('js-pornstar-list')}]")
+CHANNEL_LIST_XPATH = etree.XPath(f"//div[@id='galleries'][{has_class('js-channel-list')}]")
+ANY_GALLERY_LIST_XPATH = etree.XPath(f"//div[{has_class('js-gallery-list')}]")
+
+VIDEO_ITEMS_XPATH = etree.XPath(f".//div[{has_class('b-thumb-item')}][not({has_class('random-thumb')})]")
+CATEGORY_ITEMS_XPATH = etree.XPath(f".//div[{has_class('b-thumb-item--cat')}]") # Channels reuse the --cat class
+PORNSTAR_ITEMS_XPATH = etree.XPath(f".//div[{has_class('b-thumb-item--star')}]")
+# Generic listing items for POST /scrape-videos: 'div.b-thumb-item.js-thumb-item.js-thumb'
+JS_THUMB_ITEMS_XPATH = etree.XPath(
+    f"//div[{has_class('b-thumb-item')}][{has_class('js-thumb-item')}][{has_class('js-thumb')}][not({has_class('random-thumb')})]"
+)
+ANY_GALLERIES_XPATH = etree.XPath("(//div[@id='galleries'])[1]")
+ANY_THUMB_ITEM_XPATH = etree.XPath(f"(//div[{has_class('b-thumb-item')}])[1]")
+
+ITEM_TITLE_XPATH = etree.XPath(f"(.//div[{has_class('b-thumb-item__title')}])[1]")
+ITEM_TITLE_SPAN_XPATH = etree.XPath(f"(.//div[{has_class('b-thumb-item__title')}])[1]/descendant::span[1]")
+ITEM_DURATION_SPAN_XPATH = etree.XPath(f"(.//div[{has_class('b-thumb-item__duration')}])[1]/descendant::span[1]")
+ITEM_GALLERY_LINK_XPATH = etree.XPath(f"(.//a[{has_class('js-gallery-link')}])[1]")
+ITEM_GALLERY_STATS_XPATH = etree.XPath(f"(.//a[{has_class('js-gallery-stats')}])[1]")
+ITEM_TAG_LINKS_XPATH = etree.XPath(f"(.//div[{has_class('b-thumb-item__detail')}])[1]//a")
+ITEM_CATEGORY_LINK_XPATH = etree.XPath(f"(.//a[{has_class('js-category-stats')}])[1]")
+ITEM_PORNSTAR_LINK_XPATH = etree.XPath(f"(.//a[{has_class('js-pornstar-stats')}])[1]")
+ITEM_CHANNEL_LINK_XPATH = etree.XPath(f"(.//a[{has_class('js-channel-stats')}])[1]")
+
+ITEM_GALLERY_PICTURE_XPATH = etree.XPath(f"(.//picture[{has_class('js-gallery-img')}])[1]")
+ITEM_PICTURE_XPATH = etree.XPath("(.//picture)[1]")
+PICTURE_WEBP_XPATH = etree.XPath("(.//source[@type='image/webp'])[1]")
+PICTURE_JPEG_XPATH = etree.XPath("(.//source[@type='image/jpeg'])[1]")
+PICTURE_IMG_XPATH = etree.XPath("(.//img)[1]")
+
+WHITESPACE_RE = re.compile(r'\s+')
+
 # --- Pydantic Models ---
 # These define the expected structure of request bodies and response data
 
@@ -103,91 +328,192 @@ class StreamData(BaseModel):
 
 # --- Helper Scraping Functions ---
 
-def safe_scrape_page(url: str) -> BeautifulSoup:
-    """Fetches a URL and returns a BeautifulSoup object. Raises HTTPException on error."""
-    logger.info(f"Fetching: {url}")
+def finish_in_flight(key: tuple, task: "asyncio.Future[Any]") -> None:
+    """Done-callback of an IN_FLIGHT scrape. Also retrieves a failure, so that when every caller waiting on the
+    scrape was cancelled asyncio doesn't report it as 'Task exception was never retrieved'."""
+    IN_FLIGHT.pop(key, None)
+    if not task.cancelled():
+        task.exception()
+
+def cache_expiry(cache: Cache, key: tuple, value: Any) -> float:
+    """The time at which an entry stored in `cache` now expires (TLRUCache: per-entry ttu, TTLCache: fixed ttl)."""
+    now = cache.timer()
+    return cache.ttu(key, value, now) if isinstance(cache, TLRUCache) else now + cache.ttl
+
+def ttl_cached(cache: Cache):
+    """Caches the result of an async scraper in `cache`, keyed by its bound arguments.
+    Hits skip both the HTTP fetch and the parse; callers get a shallow copy so they can't mutate the cached value.
+    404s raised by the scraper are remembered in NEGATIVE_CACHE and re-raised without fetching.
+    Concurrent misses for the same key share one in-flight scrape instead of each fetching the page.
+    Entries are stored with their expiry time, which also caps the current request's RESPONSE_EXPIRY."""
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        async def scrape_and_cache(key: tuple, args: tuple, kwargs: dict) -> Any:
+            try:
+                result = await func(*args, **kwargs)
+            except HTTPException as e:
+                if e.status_code == 404: # Known-missing content: don't re-fetch it for a while
+                    NEGATIVE_CACHE[key] = e.detail
+                raise
+            entry = cache[key] = (cache_expiry(cache, key, result), result)
+            return entry
+
+        def use(entry: tuple) -> Any:
+            expires, result = entry
+            response_expiry = RESPONSE_EXPIRY.get()
+            if response_expiry is not None and expires < response_expiry[0]:
+                response_expiry[0] = expires
+            return copy.copy(result)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            key = (func.__name__,) + tuple(signature.bind(*args, **kwargs).arguments.items())
+            entry = cache.get(key)
+            if entry is not None:
+                return use(entry)
+            if key in NEGATIVE_CACHE:
+                raise HTTPException(status_code=404, detail=NEGATIVE_CACHE[key])
+
+            task = IN_FLIGHT.get(key)
+            if task is None:
+                task = asyncio.ensure_future(scrape_and_cache(key, args, kwargs))
+                IN_FLIGHT[key] = task
+                task.add_done_callback(functools.partial(finish_in_flight, key))
+            # Shielded: one caller disconnecting must not cancel the scrape the others are waiting on
+            return use(await asyncio.shield(task))
+        return wrapper
+    return decorator
+
+def parse_soup(response: httpx.Response, parse_only: Optional[SoupStrainer] = None) -> BeautifulSoup:
+    """Parses a response body into a BeautifulSoup object, optionally keeping only the elements matched by `parse_only`."""
+    # Passing the declared charset (None if the server sent none) skips BeautifulSoup's slow encoding detection
+    return BeautifulSoup(response.content, 'lxml', from_encoding=response.charset_encoding, parse_only=parse_only)
+
+def parse_tree(response: httpx.Response) -> lxml_html.HtmlElement:
+    """Parses a response body into an lxml HTML tree."""
+    # A fresh parser per call: lxml parsers must not be shared between threads
+    parser = lxml_html.HTMLParser(encoding=response.charset_encoding)
+    root = etree.fromstring(response.content, parser) if response.content.strip() else None
+    return root if root is not None else lxml_html.Element('html') # Empty body -> empty document
+
+async def fetch_and_parse(url: str, parse: Callable[[httpx.Response], T]) -> T:
+    """Fetches a URL and parses the body with `parse`. Raises HTTPException on error."""
+    logger.info("Fetching: %s", url)
     try:
-        response = requests.get(url, headers=HEADERS, timeout=15)
-        response.raise_for_status()  # Raise HTTPError for bad responses (4xx or 5xx)
-        return BeautifulSoup(response.content, 'html.parser')
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Error fetching {url}: {e}")
+        response = await ASYNC_CLIENT.get(url)
+        for attempt in range(FETCH_RETRIES): # Transient gateway errors get a couple of backed-off retries
+            if response.status_code not in RETRY_STATUSES:
+                break
+            await asyncio.sleep(RETRY_BACKOFF * 2 ** attempt)
+            response = await ASYNC_CLIENT.get(url)
+        if response.is_error: # 4xx/5xx: a plain status check, no HTTPStatusError to build and unwind
+            logger.error("Error fetching %s: HTTP %s", url, response.status_code)
+            raise HTTPException(
+                status_code=404 if response.status_code == 404 else 500, # A missing page stays a 404
+                detail=f"Failed to fetch or parse URL: {url} - upstream returned HTTP {response.status_code} {response.reason_phrase}",
+            )
+        # Parsing is CPU-bound; run it on the thread pool so other requests keep being served meanwhile
+        return await asyncio.to_thread(parse, response)
+    except HTTPException:
+        raise
+    except httpx.RequestError as e: # Timeouts, connection failures, too many redirects...
+        logger.error("Error fetching %s: %s", url, e)
         raise HTTPException(status_code=500, detail=f"Failed to fetch or parse URL: {url} - {str(e)}")
     except Exception as e:
-        logger.error(f"An unexpected error occurred during scraping or parsing {url}: {e}", exc_info=True)
+        logger.error("An unexpected error occurred during scraping or parsing %s: %s", url, e, exc_info=True)
         raise HTTPException(status_code=500, detail=f"An internal error occurred while scraping or parsing {url}: {str(e)}")
 
-def extract_image_urls(item_soup: BeautifulSoup) -> ImageUrls:
-    """Extracts ImageUrls model from an item's BeautifulSoup element."""
-    picture_tag = item_soup.find('picture', class_='js-gallery-img')
-    if not picture_tag:
-         picture_tag = item_soup.find('picture') # Fallback for other item types
-
-    img_urls_data = {} 
-    if picture_tag:
-        source_webp = picture_tag.find('source', attrs={'type': 'image/webp'})
-        if source_webp and source_webp.has_attr('srcset'):
-            img_urls_data['webp'] = source_webp['srcset']
-
-        source_jpeg = picture_tag.find('source', attrs={'type': 'image/jpeg'})
-        if source_jpeg and source_jpeg.has_attr('srcset'):
-            img_urls_data['jpeg'] = source_jpeg['srcset']
-
-        img_tag = picture_tag.find('img')
-        if img_tag:
-            img_src_val = img_tag.get('data-src', img_tag.get('src'))
-            if img_src_val:
-                 img_urls_data['img_src'] = img_src_val
-    
-    return ImageUrls(**img_urls_data)
+async def safe_scrape_page(url: str, parse_only: Optional[SoupStrainer] = None) -> BeautifulSoup:
+    """Fetches a URL and returns a BeautifulSoup object. Raises HTTPException on error."""
+    return await fetch_and_parse(url, functools.partial(parse_soup, parse_only=parse_only))
+
+async def safe_scrape_tree(url: str) -> lxml_html.HtmlElement:
+    """Fetches a URL and returns an lxml HTML tree. Raises HTTPException on error."""
+    return await fetch_and_parse(url, parse_tree)
+
+def absolute_url(href: str) -> str:
+    """Prefixes site-relative hrefs ('/path') with BASE_URL and gives protocol-relative ones ('//host/path')
+    BASE_URL's scheme; any other href is returned unchanged. app1.absolute_url follows the same rule."""
+    if not href.startswith('/'):
+        return href
+    return urljoin(BASE_URL, href) if href.startswith('//') else BASE_URL + href
+
+def first(nodes: list) -> Any:
+    """Returns the first result of a compiled XPath, or None if it matched nothing."""
+    return nodes[0] if nodes else None
+
+def element_text(element: Optional[lxml_html.HtmlElement]) -> str:
+    """Equivalent of BeautifulSoup's get_text(strip=True) for an lxml element ('' for None)."""
+    if element is None:
+        return ""
+    return "".join(text.strip() for text in element.itertext())
+
+def element_snippet(element: lxml_html.HtmlElement) -> str:
+    """Short HTML snippet of an element for log messages."""
+    return lxml_html.tostring(element, encoding='unicode')[:200]
+
+def extract_image_urls_from_element(item: lxml_html.HtmlElement) -> ImageUrls:
+    """Extracts ImageUrls model from an item's lxml element."""
+    picture_tag = first(ITEM_GALLERY_PICTURE_XPATH(item))
+    if picture_tag is None:
+         picture_tag = first(ITEM_PICTURE_XPATH(item)) # Fallback for other item types
+
+    if picture_tag is None:
+        return ImageUrls.model_construct()
+
+    source_webp = first(PICTURE_WEBP_XPATH(picture_tag))
+    source_jpeg = first(PICTURE_JPEG_XPATH(picture_tag))
+    img_tag = first(PICTURE_IMG_XPATH(picture_tag))
+    return ImageUrls.model_construct(
+        webp=source_webp.get('srcset') if source_webp is not None else None,
+        jpeg=source_jpeg.get('srcset') if source_jpeg is not None else None,
+        img_src=(img_tag.get('data-src', img_tag.get('src')) or None) if img_tag is not None else None,
+    )
 
 # --- NEW HELPER FUNCTIONS FOR /scrape (GET) ENDPOINT ---
 
-def extract_gallery_data_from_item(item_soup: BeautifulSoup) -> Optional[VideoData]:
+def extract_gallery_data_from_item(item: lxml_html.HtmlElement) -> Optional[VideoData]:
     """
-    Extracts gallery item data from a BeautifulSoup representation of a 'div.b-thumb-item'.
+    Extracts gallery item data from an lxml element for a 'div.b-thumb-item'.
     This function is specific to the logic required by the /scrape (GET) endpoint,
     particularly the 'title' field generation.
     """
-    link_tag = item_soup.find('a', class_='js-gallery-stats')
+    link_tag = first(ITEM_GALLERY_STATS_XPATH(item))
     
-    if not link_tag:
-        logger.debug(f"Item skipped for /scrape endpoint: 'a.js-gallery-stats' not found in {item_soup.name} with classes {item_soup.get('class', [])}.")
+    if link_tag is None:
+        logger.debug("Item skipped for /scrape endpoint: 'a.js-gallery-stats' not found in %s with classes %s.", item.tag, item.get('class', ''))
         return None
 
     href = link_tag.get('href')
     link = None
     if href:
-        link = f"{BASE_URL}{href}" if href.startswith('/') else href
+        link = absolute_url(href)
 
     gallery_id = link_tag.get('data-gallery-id')
 
     title_attribute_val = link_tag.get('title') 
     cleaned_main_title = None
     if title_attribute_val:
-        cleaned_main_title = re.sub(r'\s+', '', title_attribute_val)
+        cleaned_main_title = WHITESPACE_RE.sub('', title_attribute_val)
 
-    duration_tag = item_soup.find('div', class_='b-thumb-item__duration')
-    duration_span = duration_tag.find('span') if duration_tag else None
-    duration = duration_span.get_text(strip=True) if duration_span else None
+    duration_span = first(ITEM_DURATION_SPAN_XPATH(item))
+    duration = element_text(duration_span) if duration_span is not None else None
 
-    image_urls_model = extract_image_urls(item_soup)
+    image_urls_model = extract_image_urls_from_element(item)
     preview_video_url_val = link_tag.get('data-preview')
     thumb_id_val = link_tag.get('data-thumb-id')
 
     tags_list = []
-    detail_tag = item_soup.find('div', class_='b-thumb-item__detail')
-    if detail_tag:
-        tag_links_in_detail = detail_tag.find_all('a')
-        for tag_a in tag_links_in_detail:
-            tag_name_text = tag_a.get_text(strip=True)
-            tag_href = tag_a.get('href')
-            if tag_href and tag_name_text:
-                full_tag_link = f"{BASE_URL}{tag_href}" if tag_href.startswith('/') else tag_href
-                tags_list.append(Tag(link=full_tag_link, name=tag_name_text))
+    for tag_a in ITEM_TAG_LINKS_XPATH(item):
+        tag_name_text = element_text(tag_a)
+        tag_href = tag_a.get('href')
+        if tag_href and tag_name_text:
+            full_tag_link = absolute_url(tag_href)
+            tags_list.append(Tag.model_construct(link=full_tag_link, name=tag_name_text))
 
     if link:
-        return VideoData(
+        return VideoData.model_construct(
             duration=duration,
             gallery_id=gallery_id,
             image_urls=image_urls_model,
@@ -199,29 +525,26 @@ def extract_gallery_data_from_item(item_soup: BeautifulSoup) -> Optional[VideoDa
             title_attribute=title_attribute_val
         )
     else:
-        logger.warning(f"Skipping gallery item for /scrape endpoint due to missing link from 'a.js-gallery-stats'.")
+        logger.warning("Skipping gallery item for /scrape endpoint due to missing link from 'a.js-gallery-stats'.")
         return None
 
-def scrape_url_for_gallery_data(url: str) -> List[VideoData]:
+async def scrape_url_for_gallery_data(url: str) -> List[VideoData]:
     """
     Scrapes a given URL for gallery data, expecting items in 'div.b-thumb-item' format.
     Uses `extract_gallery_data_from_item` for parsing individual items.
     This is the main worker function for the /scrape (GET) endpoint.
     """
-    logger.info(f"Attempting to scrape gallery data from URL for /scrape endpoint: {url}")
-    soup = safe_scrape_page(url)
+    logger.info("Attempting to scrape gallery data from URL for /scrape endpoint: %s", url)
+    tree = await safe_scrape_tree(url)
 
-    gallery_item_divs = soup.find_all('div', class_='b-thumb-item')
+    gallery_item_divs = VIDEO_ITEMS_XPATH(tree) # Items anywhere on the page; random-thumb items are excluded by the XPath
     
     if not gallery_item_divs:
-        logger.info(f"No 'div.b-thumb-item' elements found on {url} for /scrape. Returning empty list.")
+        logger.info("No 'div.b-thumb-item' elements found on %s for /scrape. Returning empty list.", url)
         return []
 
     scraped_galleries = []
     for item_div in gallery_item_divs:
-        if "random-thumb" in item_div.get("class", []):
-            continue
-        
         gallery_data = extract_gallery_data_from_item(item_div)
         if gallery_data:
             scraped_galleries.append(gallery_data)
@@ -231,10 +554,169 @@ def scrape_url_for_gallery_data(url: str) -> List[VideoData]:
 # --- END OF NEW HELPER FUNCTIONS ---
 
 
-def scrape_generic_video_list_page(section: str, page_number: int) -> List[VideoData]:
+def parse_video_item(item: lxml_html.HtmlElement, scrape_url: str) -> Optional[VideoData]:
+    """Builds a VideoData model from one 'div.b-thumb-item' element, or None if it has neither link nor title.
+    Models are built with model_construct: the scraped values are already plain strings, and FastAPI still
+    checks the response against response_model when serializing it."""
+    title_elem = first(ITEM_TITLE_XPATH(item))
+    title = element_text(title_elem) if title_elem is not None else None
+    title_attribute = None 
+
+    duration_span = first(ITEM_DURATION_SPAN_XPATH(item))
+    duration = element_text(duration_span) if duration_span is not None else None
+
+    image_urls_data = extract_image_urls_from_element(item) 
+
+    link = None
+    gallery_id = None
+    thumb_id = None
+    preview_video_url = None
+    link_elem = first(ITEM_GALLERY_LINK_XPATH(item)) # Primary link for these sections
+    if link_elem is None: # Fallback if only js-gallery-stats is present on main link
+        link_elem = first(ITEM_GALLERY_STATS_XPATH(item))
+
+    if link_elem is not None:
+        href = link_elem.get("href")
+        link = absolute_url(href) if href else href
+        gallery_id = link_elem.get("data-gallery-id")
+        thumb_id = link_elem.get("data-thumb-id")
+        preview_video_url = link_elem.get("data-preview")
+        title_attribute = link_elem.get("title") 
+
+    if not title and title_attribute: # Use title from <a> tag if specific title div is empty/missing
+        title = title_attribute
+
+    tags = [
+        Tag.model_construct(
+            link=absolute_url(link_a.get('href')),
+            name=element_text(link_a)
+        )
+        for link_a in ITEM_TAG_LINKS_XPATH(item) if link_a.get('href') and element_text(link_a)
+    ]
+
+    if link or title:
+         return VideoData.model_construct(
+             duration=duration,
+             gallery_id=gallery_id,
+             image_urls=image_urls_data,
+             link=link,
+             preview_video_url=preview_video_url,
+             tags=tags,
+             thumb_id=thumb_id,
+             title=title,
+             title_attribute=title_attribute
+         )
+    logger.warning("Skipping video item from %s due to missing link and title: %s", scrape_url, element_snippet(item))
+    return None
+
+def parse_video_items(items: List[lxml_html.HtmlElement], scrape_url: str) -> List[VideoData]:
+    """Builds VideoData models from the 'div.b-thumb-item' elements of a video listing or search page."""
+    return [video for item in items if (video := parse_video_item(item, scrape_url)) is not None]
+
+class VideoListPage(NamedTuple):
+    """What a video listing or search page yielded when stream-parsed."""
+    has_gallery_list: bool # Whether the 'div#galleries.js-gallery-list' container was present
+    no_results_text: Optional[str] # Text of the first 'div.b-catalog-info-descr', if any
+    videos: List[VideoData]
+
+def is_gallery_list(element: etree._Element) -> bool:
+    return element.get('id') == 'galleries' and 'js-gallery-list' in element.get('class', '').split()
+
+def parse_video_list_page(response: httpx.Response, scrape_url: str) -> VideoListPage:
+    """Stream-parses a video listing or search page with iterparse. Each item becomes a VideoData as soon as
+    its closing tag is read and is then cleared, so the item subtrees never accumulate in memory."""
+    if not response.content.strip():
+        return VideoListPage(False, None, [])
+
+    gallery_list = None
+    no_results_text = None
+    videos = []
+    events = etree.iterparse(
+        io.BytesIO(response.content), events=('end',), tag='div', html=True, encoding=response.charset_encoding
+    )
+    for _, element in events:
+        classes = element.get('class', '').split()
+        if 'b-thumb-item' in classes:
+            if 'random-thumb' not in classes:
+                # Items close before their container, which is still reachable through the ancestors
+                container = next((div for div in element.iterancestors('div') if is_gallery_list(div)), None)
+                if container is not None and (gallery_list is None or container is gallery_list):
+                    gallery_list = container
+                    video = parse_video_item(element, scrape_url)
+                    if video is not None:
+                        videos.append(video)
+            element.clear(keep_tail=True)
+        elif gallery_list is None and is_gallery_list(element): # A container without any items
+            gallery_list = element
+        elif no_results_text is None and 'b-catalog-info-descr' in classes:
+            no_results_text = element_text(element)
+    return VideoListPage(gallery_list is not None, no_results_text, videos)
+
+class ThumbEntitySpec(NamedTuple):
+    """Describes one of the category/pornstar/channel listings, which share the same thumb-item layout."""
+    kind: str # Used in log messages
+    model: Type[BaseModel]
+    id_field: str # Model field receiving the item's id
+    name_field: str # Model field receiving the item's name/title
+    list_xpath: etree.XPath # The '#galleries' container
+    items_xpath: etree.XPath
+    link_xpath: etree.XPath
+    id_attr: str # Attribute of the link holding the item's id
+    name_xpath: etree.XPath # Element whose text can replace the link's title attribute
+    prefer_longer_name: bool # Replace the link title when the element text is longer, not only when it's missing
+
+CATEGORY_SPEC = ThumbEntitySpec(
+    kind="category", model=CategoryData, id_field="category_id", name_field="title",
+    list_xpath=CATEGORY_LIST_XPATH, items_xpath=CATEGORY_ITEMS_XPATH, link_xpath=ITEM_CATEGORY_LINK_XPATH,
+    id_attr="data-category-id", name_xpath=ITEM_TITLE_XPATH, prefer_longer_name=True,
+)
+PORNSTAR_SPEC = ThumbEntitySpec(
+    kind="pornstar", model=PornstarData, id_field="pornstar_id", name_field="name",
+    list_xpath=PORNSTAR_LIST_XPATH, items_xpath=PORNSTAR_ITEMS_XPATH, link_xpath=ITEM_PORNSTAR_LINK_XPATH,
+    id_attr="data-pornstar-id", name_xpath=ITEM_TITLE_XPATH, prefer_longer_name=False,
+)
+CHANNEL_SPEC = ThumbEntitySpec(
+    kind="channel", model=ChannelData, id_field="channel_id", name_field="name",
+    list_xpath=CHANNEL_LIST_XPATH, items_xpath=CATEGORY_ITEMS_XPATH, # Channels use the --cat class
+    link_xpath=ITEM_CHANNEL_LINK_XPATH, id_attr="data-channel-id", name_xpath=ITEM_TITLE_SPAN_XPATH, prefer_longer_name=True,
+)
+
+def parse_thumb_entities(tree: lxml_html.HtmlElement, spec: ThumbEntitySpec, scrape_url: str) -> List[BaseModel]:
+    """Extracts the category/pornstar/channel items described by `spec` from a parsed listing page."""
+    list_container = first(spec.list_xpath(tree))
+    if list_container is None:
+        if ANY_GALLERY_LIST_XPATH(tree): logger.info("Found gallery list, not %s items on %s.", spec.kind, scrape_url)
+        return []
+    items = spec.items_xpath(list_container)
+    if not items: return []
+
+    scraped_data = []
+    for item in items:
+        link_tag = first(spec.link_xpath(item))
+        link, entity_id, name = None, None, None
+        if link_tag is not None:
+            href_relative = link_tag.get('href')
+            link = absolute_url(href_relative) if href_relative else href_relative
+            entity_id = link_tag.get(spec.id_attr)
+            name = link_tag.get('title', '').strip()
+
+        element_name = element_text(first(spec.name_xpath(item)))
+        if element_name and (not name or (spec.prefer_longer_name and len(element_name) > len(name))):
+             name = element_name
+
+        image_urls = extract_image_urls_from_element(item)
+        if link and name:
+            scraped_data.append(spec.model.model_construct(**{
+                'link': link, spec.id_field: entity_id, spec.name_field: name, 'image_urls': image_urls,
+            }))
+        else:
+            logger.warning("Skipping %s item due to missing data from %s: %s", spec.kind, scrape_url, element_snippet(item))
+    return scraped_data
+
+
+@ttl_cached(PAGE_CACHE)
+async def scrape_generic_video_list_page(section: str, page_number: int) -> List[VideoData]:
     """Scrapes lists of videos from pages like /fresh, /best, /trend."""
-    if page_number <= 0:
-        raise HTTPException(status_code=400, detail="Page number must be positive.")
 
     if section == "trend":
          scrape_url = f"{BASE_URL}/trend/{page_number}" 
@@ -243,307 +725,119 @@ def scrape_generic_video_list_page(section: str, page_number: int) -> List[Video
     else:
          scrape_url = f"{BASE_URL}/{section}/{page_number}/" 
 
-    soup = safe_scrape_page(scrape_url)
-    gallery_list_container = soup.find('div', id='galleries', class_='js-gallery-list')
-
-    if not gallery_list_container:
-        logger.warning(f"Gallery list container not found on {scrape_url}. No items found?")
+    page = await fetch_and_parse(scrape_url, functools.partial(parse_video_list_page, scrape_url=scrape_url))
+    if not page.has_gallery_list:
+        logger.warning("Gallery list container not found on %s. No items found?", scrape_url)
         return [] 
 
-    items = gallery_list_container.find_all('div', class_='b-thumb-item')
-    if not items:
-        logger.info(f"No video items found on {scrape_url}.")
-        return [] 
-
-    videos = []
-    for item in items:
-        if "random-thumb" in item.get("class", []):
-            continue
-
-        title_elem = item.find("div", class_="b-thumb-item__title")
-        title = title_elem.get_text(strip=True) if title_elem else None
-        title_attribute = None 
-
-        duration_elem = item.find("div", class_="b-thumb-item__duration")
-        duration_span = duration_elem.find("span") if duration_elem else None
-        duration = duration_span.get_text(strip=True) if duration_span else None
-
-        image_urls_data = extract_image_urls(item) 
-
-        link = None
-        gallery_id = None
-        thumb_id = None
-        preview_video_url = None
-        link_elem = item.find("a", class_="js-gallery-link") # Primary link for these sections
-        if not link_elem: # Fallback if only js-gallery-stats is present on main link
-            link_elem = item.find("a", class_="js-gallery-stats")
-
-        if link_elem:
-            href = link_elem.get("href")
-            link = f"{BASE_URL}{href}" if href and href.startswith('/') else href
-            gallery_id = link_elem.get("data-gallery-id")
-            thumb_id = link_elem.get("data-thumb-id")
-            preview_video_url = link_elem.get("data-preview")
-            title_attribute = link_elem.get("title") 
-
-        if not title and title_attribute: # Use title from <a> tag if specific title div is empty/missing
-            title = title_attribute
-
-        categories_elem = item.find("div", class_="b-thumb-item__detail")
-        tags = []
-        if categories_elem:
-            tag_links = categories_elem.find_all("a")
-            tags = [
-                Tag(
-                    link=f"{BASE_URL}{link_a['href']}" if link_a.get('href', '').startswith('/') else link_a.get('href'),
-                    name=link_a.get_text(strip=True)
-                )
-                for link_a in tag_links if link_a.get('href') and link_a.get_text(strip=True)
-            ]
-
-        if link or title:
-             video = VideoData(
-                 duration=duration,
-                 gallery_id=gallery_id,
-                 image_urls=image_urls_data,
-                 link=link,
-                 preview_video_url=preview_video_url,
-                 tags=tags,
-                 thumb_id=thumb_id,
-                 title=title,
-                 title_attribute=title_attribute
-             )
-             videos.append(video)
-        else:
-             logger.warning(f"Skipping video item from {scrape_url} due to missing link and title: {item.prettify()[:200]}")
-    return videos
+    if not page.videos: # random-thumb items are skipped while parsing
+        logger.info("No video items found on %s.", scrape_url)
+    return page.videos
 
-def scrape_search_page(search_content: str, page_number: int) -> List[VideoData]:
+@ttl_cached(PAGE_CACHE)
+async def scrape_search_page(search_content: str, page_number: int) -> List[VideoData]:
      """Scrapes search results pages."""
-     if page_number <= 0:
-         raise HTTPException(status_code=400, detail="Page number must be positive.")
      if not search_content:
          raise HTTPException(status_code=400, detail="Search content cannot be empty.")
 
-     safe_search_content = quote(search_content)
+     safe_search_content = quote(search_content, safe='') # Also escapes '/' so the query stays one path segment
      if page_number == 1:
          scrape_url = f"{BASE_URL}/search/{safe_search_content}/"
      else:
          scrape_url = f"{BASE_URL}/search/{safe_search_content}/{page_number}/"
 
-     soup = safe_scrape_page(scrape_url)
-     no_results_message = soup.find('div', class_='b-catalog-info-descr')
-     if no_results_message and "no results found" in no_results_message.get_text(strip=True).lower():
-          logger.info(f"Site reported 'No results found' for '{search_content}' on {scrape_url}")
+     page = await fetch_and_parse(scrape_url, functools.partial(parse_video_list_page, scrape_url=scrape_url))
+     if page.no_results_text is not None and "no results found" in page.no_results_text.lower():
+          logger.info("Site reported 'No results found' for '%s' on %s", search_content, scrape_url)
           return []
 
-     gallery_list_container = soup.find('div', id='galleries', class_='js-gallery-list')
-     if not gallery_list_container:
-         logger.warning(f"Gallery list container not found on search page {scrape_url}.")
+     if not page.has_gallery_list:
+         logger.warning("Gallery list container not found on search page %s.", scrape_url)
          return [] 
 
-     items = gallery_list_container.find_all('div', class_='b-thumb-item')
-     if not items:
-         logger.info(f"No video items found on search page {scrape_url}.")
-         return []
-
-     videos = [] # Replicate item parsing, similar to scrape_generic_video_list_page
-     for item in items:
-        if "random-thumb" in item.get("class", []):
-            continue
-
-        title_elem = item.find("div", class_="b-thumb-item__title")
-        title = title_elem.get_text(strip=True) if title_elem else None
-        title_attribute = None
-
-        duration_elem = item.find("div", class_="b-thumb-item__duration")
-        duration_span = duration_elem.find("span") if duration_elem else None
-        duration = duration_span.get_text(strip=True) if duration_span else None
-
-        image_urls_data = extract_image_urls(item)
-
-        link = None; gallery_id = None; thumb_id = None; preview_video_url = None
-        link_elem = item.find("a", class_="js-gallery-link") # Prefer js-gallery-link for search results too
-        if not link_elem: link_elem = item.find("a", class_="js-gallery-stats")
-
-
-        if link_elem:
-            href = link_elem.get("href")
-            link = f"{BASE_URL}{href}" if href and href.startswith('/') else href
-            gallery_id = link_elem.get("data-gallery-id")
-            thumb_id = link_elem.get("data-thumb-id")
-            preview_video_url = link_elem.get("data-preview")
-            title_attribute = link_elem.get("title")
-
-        if not title and title_attribute:
-            title = title_attribute
-
-        categories_elem = item.find("div", class_="b-thumb-item__detail")
-        tags = []
-        if categories_elem:
-            tag_links = categories_elem.find_all("a")
-            tags = [
-                Tag(
-                    link=f"{BASE_URL}{link_a['href']}" if link_a.get('href', '').startswith('/') else link_a.get('href'),
-                    name=link_a.get_text(strip=True)
-                )
-                for link_a in tag_links if link_a.get('href') and link_a.get_text(strip=True)
-            ]
-
-        if link or title:
-             videos.append(VideoData(
-                 duration=duration, gallery_id=gallery_id, image_urls=image_urls_data, link=link,
-                 preview_video_url=preview_video_url, tags=tags, thumb_id=thumb_id, title=title,
-                 title_attribute=title_attribute
-             ))
-        else:
-             logger.warning(f"Skipping search result item from {scrape_url} due to missing link/title: {item.prettify()[:200]}")
-     return videos
+     if not page.videos:
+         logger.info("No video items found on search page %s.", scrape_url)
+     return page.videos
 
 
-def scrape_category_list_page(page_number: int) -> List[CategoryData]:
-    if page_number <= 0:
-        raise HTTPException(status_code=400, detail="Page number must be positive.")
+@ttl_cached(PAGE_CACHE)
+async def scrape_category_list_page(page_number: int) -> List[CategoryData]:
     scrape_url = f"{BASE_URL}/categories/{page_number}" if page_number > 1 else f"{BASE_URL}/categories/"
-    soup = safe_scrape_page(scrape_url)
-    category_list_container = soup.find('div', id='galleries', class_='js-category-list')
-    if not category_list_container: return []
-    items = category_list_container.find_all('div', class_='b-thumb-item--cat')
-    if not items: return []
-    
-    scraped_data = []
-    for item_soup in items:
-        link_tag = item_soup.find('a', class_='js-category-stats')
-        link, category_id, title = None, None, None
-        if link_tag:
-            href_relative = link_tag.get('href')
-            link = f"{BASE_URL}{href_relative}" if href_relative and href_relative.startswith('/') else href_relative
-            category_id = link_tag.get('data-category-id')
-            title = link_tag.get('title', '').strip()
-
-        title_div = item_soup.find('div', class_='b-thumb-item__title')
-        div_text = title_div.get_text(strip=True) if title_div else ""
-        if div_text and (not title or len(div_text) > len(title)):
-             title = div_text
-        
-        image_urls = extract_image_urls(item_soup)
-        if link and title:
-            scraped_data.append(CategoryData(link=link, category_id=category_id, title=title, image_urls=image_urls))
-        else:
-            logger.warning(f"Skipping category item due to missing data from {scrape_url}: {item_soup.prettify()[:200]}")
-    return scraped_data
+    return parse_thumb_entities(await safe_scrape_tree(scrape_url), CATEGORY_SPEC, scrape_url)
 
 
-def scrape_pornstar_list_page(page_number: int) -> List[PornstarData]:
-    if page_number <= 0:
-        raise HTTPException(status_code=400, detail="Page number must be positive.")
+@ttl_cached(PAGE_CACHE)
+async def scrape_pornstar_list_page(page_number: int) -> List[PornstarData]:
     scrape_url = f"{BASE_URL}/pornstars/{page_number}/" if page_number > 1 else f"{BASE_URL}/pornstars/"
-    soup = safe_scrape_page(scrape_url)
-    pornstar_list_container = soup.find('div', id='galleries', class_='js-pornstar-list')
-    if not pornstar_list_container:
-        if soup.find('div', class_='js-gallery-list'): logger.info(f"Found gallery list, not pornstars on {scrape_url}.")
-        return []
-    items = pornstar_list_container.find_all('div', class_='b-thumb-item--star')
-    if not items: return []
-
-    scraped_data = []
-    for item_soup in items:
-        link_tag = item_soup.find('a', class_='js-pornstar-stats')
-        link, pornstar_id, name = None, None, None
-        if link_tag:
-            href_relative = link_tag.get('href')
-            link = f"{BASE_URL}{href_relative}" if href_relative and href_relative.startswith('/') else href_relative
-            pornstar_id = link_tag.get('data-pornstar-id')
-            name = link_tag.get('title', '').strip()
-
-        title_div = item_soup.find('div', class_='b-thumb-item__title')
-        div_text = title_div.get_text(strip=True) if title_div else ""
-        if div_text and not name : # Only use div title if <a> title was missing
-            name = div_text
-            
-        image_urls = extract_image_urls(item_soup)
-        if link and name:
-             scraped_data.append(PornstarData(link=link, pornstar_id=pornstar_id, name=name, image_urls=image_urls))
-        else:
-            logger.warning(f"Skipping pornstar item due to missing data from {scrape_url}: {item_soup.prettify()[:200]}")
-    return scraped_data
+    return parse_thumb_entities(await safe_scrape_tree(scrape_url), PORNSTAR_SPEC, scrape_url)
 
-def scrape_channel_list_page(page_number: int) -> List[ChannelData]:
-    if page_number <= 0:
-        raise HTTPException(status_code=400, detail="Page number must be positive.")
+@ttl_cached(PAGE_CACHE)
+async def scrape_channel_list_page(page_number: int) -> List[ChannelData]:
     scrape_url = f"{BASE_URL}/channels/{page_number}/" if page_number > 1 else f"{BASE_URL}/channels/"
-    soup = safe_scrape_page(scrape_url)
-    channel_list_container = soup.find('div', id='galleries', class_='js-channel-list')
-    if not channel_list_container:
-        if soup.find('div', class_='js-gallery-list'): logger.info(f"Found gallery list, not channels on {scrape_url}.")
-        return []
-    items = channel_list_container.find_all('div', class_='b-thumb-item--cat') # Uses --cat class
-    if not items: return []
+    return parse_thumb_entities(await safe_scrape_tree(scrape_url), CHANNEL_SPEC, scrape_url)
 
-    scraped_data = []
-    for item_soup in items:
-        link_tag = item_soup.find('a', class_='js-channel-stats')
-        link, channel_id, name = None, None, None
-        if link_tag:
-            href_relative = link_tag.get('href')
-            link = f"{BASE_URL}{href_relative}" if href_relative and href_relative.startswith('/') else href_relative
-            channel_id = link_tag.get('data-channel-id')
-            name = link_tag.get('title', '').strip()
 
-        title_div = item_soup.find('div', class_='b-thumb-item__title')
-        if title_div:
-            title_span = title_div.find('span')
-            span_name = title_span.get_text(strip=True) if title_span else ""
-            if span_name and (not name or len(span_name) > len(name)):
-                 name = span_name
-                 
-        image_urls = extract_image_urls(item_soup)
-        if link and name:
-             scraped_data.append(ChannelData(link=link, channel_id=channel_id, name=name, image_urls=image_urls))
-        else:
-            logger.warning(f"Skipping channel item due to missing data from {scrape_url}: {item_soup.prettify()[:200]}")
-    return scraped_data
-
-
-def scrape_video_stream_data(video_page_url: str) -> StreamData:
-    if not video_page_url or not video_page_url.startswith('http'):
+@ttl_cached(STREAM_CACHE)
+async def scrape_video_stream_data(video_page_url: str) -> StreamData:
+    if not video_page_url or not video_page_url.startswith(('http://', 'https://')):
          raise HTTPException(status_code=400, detail=f"Invalid video page URL provided: {video_page_url}")
 
-    soup = safe_scrape_page(video_page_url)
+    soup = await safe_scrape_page(video_page_url, parse_only=VIDEO_STRAINER)
     stream_data = StreamData(video_page_url=video_page_url)
 
     video_tag = soup.find('video', id='video_html5_api')
     if not video_tag:
         player_div = soup.find('div', class_='b-video-player')
-        if player_div: video_tag = player_div.find('video')
+        if player_div:
+            video_tag = player_div.find('video')
 
     if not video_tag:
-        logger.warning(f"Video player tag not found on {video_page_url}.")
+        logger.warning("Video player tag not found on %s.", video_page_url)
         raise HTTPException(status_code=404, detail="Video player tag not found on the page.")
 
-    if video_tag.has_attr('src'):
-        stream_data.main_video_src = video_tag['src']
-
-    found_sources = set()
-    if stream_data.main_video_src: found_sources.add(stream_data.main_video_src)
+    video_attrs = video_tag.attrs # Plain dict reads, bypassing Tag.get/has_attr
+    stream_data.main_video_src = video_attrs.get('src')
 
+    # One pass: the first <source> per src wins (dicts keep insertion order), the main src is not repeated
+    sources_by_src = {}
     for source_tag in video_tag.find_all('source'):
-        src_url = source_tag.get('src')
-        if src_url and src_url not in found_sources:
-             stream_data.source_tags.append(StreamSource(
-                 src=src_url, type=source_tag.get('type'), size=source_tag.get('size')
-             ))
-             found_sources.add(src_url)
+        source_attrs = source_tag.attrs
+        src_url = source_attrs.get('src')
+        if src_url and src_url != stream_data.main_video_src:
+            sources_by_src.setdefault(src_url, source_attrs)
+    stream_data.source_tags = [
+        StreamSource.model_construct(src=src_url, type=source_attrs.get('type'), size=source_attrs.get('size'))
+        for src_url, source_attrs in sources_by_src.items()
+    ]
 
     if not stream_data.main_video_src and not stream_data.source_tags:
         stream_data.note = "No direct video <src> or <source> tags found. Video might be JS loaded."
-    if video_tag.has_attr('poster'):
-        stream_data.poster_image = video_tag['poster']
-    if video_tag.has_attr('data-preview'):
-        sprite_string = video_tag['data-preview']
+    stream_data.poster_image = video_attrs.get('poster')
+    sprite_string = video_attrs.get('data-preview')
+    if sprite_string is not None:
         stream_data.sprite_previews = [s.strip() for s in sprite_string.split(',') if s.strip()]
     return stream_data
 
+async def scrape_pages(scrape_page: Callable[[int], Awaitable[List[T]]], page_numbers: List[int]) -> List[T]:
+    """Runs `scrape_page` for several page numbers concurrently (at most MAX_BATCH_CONCURRENCY at a time)
+    and returns all their items in page order.
+    A page that doesn't exist (404) ends the batch: the items of the pages before it are returned, and those
+    after it are dropped, so asking past the last page isn't an error. Any other failure fails the whole batch."""
+    semaphore = asyncio.Semaphore(MAX_BATCH_CONCURRENCY)
+    async def scrape_one(page_number: int) -> List[T]:
+        async with semaphore:
+            return await scrape_page(page_number)
+
+    results = await asyncio.gather(*(scrape_one(p) for p in page_numbers), return_exceptions=True)
+    items = []
+    for page_items in results:
+        if isinstance(page_items, HTTPException) and page_items.status_code == 404:
+            break
+        if isinstance(page_items, BaseException):
+            raise page_items
+        items.extend(page_items)
+    return items
+
 # --- API Endpoints ---
 
 @app.get("/")
@@ -557,6 +851,7 @@ async def root():
             "/scrape?url={url_to_scrape}": "GET - Scrape gallery data from a generic URL (new).", # MODIFIED
             "/scrape-videos": "POST - Scrape video data from a generic listing URL (provide URL in request body).",
             "/api/fresh/{page_number}": "GET - Scrape fresh videos by page number.",
+            "/api/fresh/batch?pages=1,2,3": "GET - Scrape several fresh video pages concurrently.",
             "/api/best/{page_number}": "GET - Scrape best-rated videos by page number.",
             "/api/trend/{page_number}": "GET - Scrape trending videos by page number.",
             "/api/search/{search_content}/{page_number}": "GET - Search for videos by content and page number.",
@@ -564,6 +859,7 @@ async def root():
             "/api/pornstars/{page_number}": "GET - Scrape pornstars list by page number.",
             "/api/channels/{page_number}": "GET - Scrape channels list by page number.",
             "/api/stream/{video_page_link:path}": "GET - Scrape a specific video page for streaming links.",
+            "/api/cache/flush": "POST - Drop all cached scrape results (admin: X-Admin-Token header).",
         }
     }
 
@@ -580,12 +876,12 @@ async def scrape_galleries_from_url(
     - The `title` field in the response is a special version: the `title` attribute of the `a.js-gallery-stats` tag, with all whitespace characters removed.
     - The `title_attribute` field stores the original `title` attribute from the `a.js-gallery-stats` tag.
     """
-    if not url or not (url.startswith("http://") or url.startswith("https://")):
+    if not url or not url.startswith(("http://", "https://")):
         raise HTTPException(
             status_code=400, 
             detail="Invalid URL provided. Must be a full HTTP/HTTPS URL."
         )
-    return scrape_url_for_gallery_data(url)
+    return await scrape_url_for_gallery_data(url)
 
 
 @app.post("/scrape-videos", response_model=List[VideoData], summary="Scrape generic video listing page (POST)")
@@ -596,125 +892,101 @@ async def scrape_videos_endpoint(request: ScrapeRequest):
     and extracts data based on common structures found on the site.
     The 'title' is typically the display title, and 'title_attribute' is the hover title.
     """
-    logger.info(f"Attempting to scrape videos from generic URL (POST): {request.url}")
-    soup = safe_scrape_page(request.url)
-    
-    # Selector used by original /scrape-videos logic for general video items
-    video_items = soup.find_all("div", class_="b-thumb-item js-thumb-item js-thumb") 
+    logger.info("Attempting to scrape videos from generic URL (POST): %s", request.url)
+    tree = await safe_scrape_tree(request.url)
 
-    videos = []
-    for item in video_items:
-        if "random-thumb" in item.get("class", []):
-            continue
-
-        title_elem = item.find("div", class_="b-thumb-item__title js-gallery-title")
-        if not title_elem: # Fallback to general title class
-             title_elem = item.find("div", class_="b-thumb-item__title")
-        
-        title_from_div = title_elem.get_text(strip=True) if title_elem else None
-        
-        duration_elem = item.find("div", class_="b-thumb-item__duration")
-        duration_span = duration_elem.find("span") if duration_elem else None
-        duration = duration_span.get_text(strip=True) if duration_span else None
-
-        image_urls_data = extract_image_urls(item)
-
-        link, gallery_id, thumb_id, preview_video_url, title_attribute_from_link = None, None, None, None, None
-        
-        # Primary link element for general video items (more specific than just js-gallery-stats)
-        link_elem = item.find("a", class_="js-gallery-link js-gallery-stats")
-        if not link_elem : # Fallback if the combined class is not present
-            link_elem = item.find("a", class_="js-gallery-link")
-            if not link_elem:
-                 link_elem = item.find("a", class_="js-gallery-stats")
-
-
-        if link_elem:
-            href = link_elem.get("href")
-            link = f"{BASE_URL}{href}" if href and href.startswith('/') else href
-            gallery_id = link_elem.get("data-gallery-id")
-            thumb_id = link_elem.get("data-thumb-id")
-            preview_video_url = link_elem.get("data-preview")
-            title_attribute_from_link = link_elem.get("title")
-
-        # Determine final title for VideoData.title
-        final_title = title_from_div
-        if not final_title and title_attribute_from_link: # If div title missing, use link's title attribute
-            final_title = title_attribute_from_link
-
-        categories_elem = item.find("div", class_="b-thumb-item__detail")
-        tags = []
-        if categories_elem:
-            tag_links = categories_elem.find_all("a")
-            tags = [
-                Tag(
-                    link=f"{BASE_URL}{link_a['href']}" if link_a.get('href', '').startswith('/') else link_a.get('href'),
-                    name=link_a.get_text(strip=True)
-                )
-                for link_a in tag_links if link_a.get('href') and link_a.get_text(strip=True)
-            ]
-
-        if link or final_title:
-            videos.append(VideoData(
-                duration=duration, gallery_id=gallery_id, image_urls=image_urls_data, link=link,
-                preview_video_url=preview_video_url, tags=tags, thumb_id=thumb_id,
-                title=final_title, title_attribute=title_attribute_from_link
-            ))
-        else:
-            logger.warning(f"Skipping item from POST /scrape-videos {request.url} due to missing link/title: {item.prettify()[:200]}")
+    videos = parse_video_items(JS_THUMB_ITEMS_XPATH(tree), request.url)
 
     if not videos:
-        if not soup.find('div', id='galleries') and not soup.find_all("div", class_="b-thumb-item"):
+        if not ANY_GALLERIES_XPATH(tree) and not ANY_THUMB_ITEM_XPATH(tree):
             raise HTTPException(status_code=404, detail="The provided URL does not appear to be a recognizable video listing page.")
         else:
-             logger.info(f"Scraped {request.url} (POST) but found 0 video items matching criteria.")
+             logger.info("Scraped %s (POST) but found 0 video items matching criteria.", request.url)
              return []
     return videos
 
 
+# Must be registered before /api/fresh/{page_number} so "batch" isn't parsed as a page number
+@app.get("/api/fresh/batch", response_model=List[VideoData], summary="Get Several Fresh Videos Pages")
+async def get_fresh_pages_batch(
+    pages: str = Query(..., description=f"Comma-separated page numbers (>0), at most {MAX_BATCH_PAGES} (e.g. 1,2,3).", pattern=r"^\d+(,\d+)*$")
+):
+    """Scrapes the requested /fresh pages concurrently and returns their videos in page order,
+    up to the first page that doesn't exist."""
+    page_numbers = [int(p) for p in pages.split(',')]
+    if len(page_numbers) > MAX_BATCH_PAGES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_PAGES} pages can be requested at once.")
+    if any(p <= 0 for p in page_numbers):
+        raise HTTPException(status_code=400, detail="Page numbers must be positive.")
+
+    return await scrape_pages(functools.partial(scrape_generic_video_list_page, "fresh"), page_numbers)
+
 @app.get("/api/fresh/{page_number}", response_model=List[VideoData], summary="Get Fresh Videos Page")
-async def get_fresh_page(page_number: int = Path(..., description="Page number (>0)", gt=0)):
-    return scrape_generic_video_list_page(section="fresh", page_number=page_number)
+async def get_fresh_page(page_number: PageNumber):
+    return await scrape_generic_video_list_page(section="fresh", page_number=page_number)
 
 @app.get("/api/best/{page_number}", response_model=List[VideoData], summary="Get Best Rated Videos Page")
-async def get_best_rated_page(page_number: int = Path(..., description="Page number (>0)", gt=0)):
-    return scrape_generic_video_list_page(section="best", page_number=page_number)
+async def get_best_rated_page(page_number: PageNumber):
+    return await scrape_generic_video_list_page(section="best", page_number=page_number)
 
 @app.get("/api/trend/{page_number}", response_model=List[VideoData], summary="Get Trending Videos Page")
-async def get_trend_page(page_number: int = Path(..., description="Page number (>0)", gt=0)):
-    return scrape_generic_video_list_page(section="trend", page_number=page_number)
+async def get_trend_page(page_number: PageNumber):
+    return await scrape_generic_video_list_page(section="trend", page_number=page_number)
 
 @app.get("/api/search/{search_content}/{page_number}", response_model=List[VideoData], summary="Search Videos")
 async def get_search_results_page(
-    search_content: str = Path(..., description="The search query."),
-    page_number: int = Path(..., description="Page number (>0)", gt=0)
+    search_content: Annotated[str, Path(description="The search query.")],
+    page_number: PageNumber,
 ):
     if not search_content.strip(): # Check if search content is not just whitespace
         raise HTTPException(status_code=400, detail="Search content cannot be empty or whitespace.")
-    return scrape_search_page(search_content=search_content, page_number=page_number)
+    return await scrape_search_page(search_content=search_content, page_number=page_number)
 
 @app.get("/api/categories/{page_number}", response_model=List[CategoryData], summary="Get Categories Page")
-async def get_categories_page(page_number: int = Path(..., description="Page number (>0)", gt=0)):
-    return scrape_category_list_page(page_number=page_number)
+async def get_categories_page(page_number: PageNumber):
+    return await scrape_category_list_page(page_number=page_number)
 
 @app.get("/api/pornstars/{page_number}", response_model=List[PornstarData], summary="Get Pornstars Page")
-async def get_pornstars_page(page_number: int = Path(..., description="Page number (>0)", gt=0)):
-    return scrape_pornstar_list_page(page_number=page_number)
+async def get_pornstars_page(page_number: PageNumber):
+    return await scrape_pornstar_list_page(page_number=page_number)
 
 @app.get("/api/channels/{page_number}", response_model=List[ChannelData], summary="Get Channels Page")
-async def get_channels_page(page_number: int = Path(..., description="Page number (>0)", gt=0)):
-    return scrape_channel_list_page(page_number=page_number)
+async def get_channels_page(page_number: PageNumber):
+    return await scrape_channel_list_page(page_number=page_number)
 
 @app.get("/api/stream/{video_page_link:path}", response_model=StreamData, summary="Get Stream Links for a Video Page")
 async def get_stream_links(
-    video_page_link: str = Path(..., description="Full URL of the video page (e.g., https://hqporn.xxx/video-slug.html). Must start with http.")
+    video_page_link: str = Path(..., description="Full URL of the video page (e.g., https://hqporn.xxx/video-slug.html). Must start with http:// or https://.")
 ):
-    return scrape_video_stream_data(video_page_url=video_page_link)
+    return await scrape_video_stream_data(video_page_url=video_page_link)
+
+def require_admin(x_admin_token: Annotated[Optional[str], Header()] = None):
+    """Rejects requests without the ADMIN_TOKEN secret; answers 404 when no token is configured."""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if x_admin_token is None or not hmac.compare_digest(x_admin_token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid or missing X-Admin-Token header.")
+
+@app.post("/api/cache/flush", summary="Flush Cached Scrape Results", dependencies=[Depends(require_admin)])
+async def flush_cache():
+    """Empties the response, page, stream and negative caches so the next requests scrape the site again.
+    Only the worker that handles the request is flushed."""
+    flushed = len(RESPONSE_CACHE) + len(PAGE_CACHE) + len(STREAM_CACHE) + len(NEGATIVE_CACHE)
+    RESPONSE_CACHE.clear()
+    PAGE_CACHE.clear()
+    STREAM_CACHE.clear()
+    NEGATIVE_CACHE.clear()
+    return {"flushed": flushed}
 
 
 # --- Main execution block for running with uvicorn ---
 if __name__ == "__main__":
     import uvicorn
-    import os
     port = int(os.environ.get("PORT", 8000)) 
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    workers = int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 1))
+    # Multiple workers need the app as an import string; uvloop and httptools come with uvicorn[standard].
+    # Each worker keeps its own page/stream caches.
+    uvicorn.run(
+        "app:app", host="0.0.0.0", port=port, workers=workers,
+        loop="uvloop", http="httptools", access_log=False,
+    )
@@ -1,23 +1,96 @@
 # main.py
 
-import requests
-from bs4 import BeautifulSoup
-from fastapi import FastAPI, HTTPException, Path
+import httpx
+from bs4 import BeautifulSoup, NavigableString, SoupStrainer
+from lxml import etree, html as lxml_html
+from fastapi import FastAPI, HTTPException, Path, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field # Use Field for parameter validation/metadata
-from typing import List, Dict, Optional, Any
-from urllib.parse import quote # Use quote for URL encoding search queries if constructing URL parts
+from typing import AsyncIterator, Awaitable, Callable, List, Dict, Optional, Any, TypeVar
+from urllib.parse import quote, urljoin # Use quote for URL encoding search queries if constructing URL parts
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from concurrent.futures import ThreadPoolExecutor
+from cachetools import LRUCache, TLRUCache, TTLCache
+import asyncio
+import copy
+import functools
+import hashlib
+import inspect
 import logging
+import queue
+import re
+import sys
+
+from etags import etag_matches
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 # --- FastAPI App Setup ---
-# Enable docs at /docs and /redoc automatically
-app = FastAPI(title="Consolidated HQPORN Scraper API")
+# Shared async HTTP client, opened on startup and closed on shutdown (see lifespan below)
+CLIENT: Optional[httpx.AsyncClient] = None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Creates the pooled HTTP/2 client used by every scraper so concurrent requests overlap their network I/O."""
+    global CLIENT
+    # Accept-Encoding is left to httpx: it advertises gzip/deflate, plus br when the brotli extra is installed,
+    # so the site is never offered an encoding we can't decode
+    CLIENT = httpx.AsyncClient(
+        headers=HEADERS,
+        timeout=15,
+        follow_redirects=True, # Match the old requests behaviour
+        transport=httpx.AsyncHTTPTransport(
+            http2=True,
+            retries=2, # Retries failed connection attempts only
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+        ),
+    )
+    try:
+        yield
+    finally:
+        await CLIENT.aclose()
 
-# Add CORS middleware to allow cross-origin requests from anywhere
+# Enable docs at /docs and /redoc automatically
+app = FastAPI(title="Consolidated HQPORN Scraper API", lifespan=lifespan)
+
+@app.middleware("http")
+async def serve_cached_responses(request: Request, call_next):
+    """Keeps the serialized body of successful GET /api listing responses in RESPONSE_CACHE, so repeat requests skip
+    the handler, response_model serialization and JSON encoding entirely. Adds Cache-Control so clients and CDNs
+    reuse a response for as long as we do, and an ETag; a matching If-None-Match is answered with 304 so
+    revalidations skip the body as well. Stream links are not cached.
+    A body expires together with the earliest PAGE_CACHE result it was built from, and max-age counts down to
+    that moment, so neither this cache nor clients keep it past the data underneath."""
+    path = request.url.path
+    if request.method != "GET" or not path.startswith("/api/") or path.startswith("/api/stream/"):
+        return await call_next(request)
+
+    key = f"{path}?{request.url.query}"
+    cached = RESPONSE_CACHE.get(key)
+    if cached is None:
+        expiry = [RESPONSE_CACHE.timer() + PAGE_TTL] # Lowered by ttl_cached while the handler runs
+        RESPONSE_EXPIRY.set(expiry)
+        response = await call_next(request)
+        if response.status_code != 200:
+            return response
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        etag = f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+        cached = RESPONSE_CACHE[key] = (etag, body, response.media_type or response.headers.get("content-type"), expiry[0])
+
+    etag, body, media_type, expires = cached
+    max_age = max(0, int(expires - RESPONSE_CACHE.timer()))
+    cache_headers = {"ETag": etag, "Cache-Control": f"public, max-age={max_age}"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=cache_headers)
+    return Response(content=body, media_type=media_type, headers=cache_headers)
+
+# Add CORS middleware to allow cross-origin requests from anywhere. Added after the response cache so it wraps it:
+# CORS headers are computed for each request's own Origin and never stored with a cached body
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"], # Allows all origins
@@ -33,8 +106,107 @@ HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
 }
 
+# Listing URL shapes as (first page, later pages); {query} is the URL-encoded search term
+URL_TMPL = {
+    "fresh": ("{base}/fresh/", "{base}/fresh/{page}/"),
+    "best": ("{base}/best/", "{base}/best/{page}/"),
+    "trend": ("{base}/trend/{page}", "{base}/trend/{page}"), # No trailing slash, even on page 1
+    "search": ("{base}/search/{query}/", "{base}/search/{query}/{page}/"),
+    "categories": ("{base}/categories/", "{base}/categories/{page}"),
+    "pornstars": ("{base}/pornstars/", "{base}/pornstars/{page}/"),
+    "channels": ("{base}/channels/", "{base}/channels/{page}/"),
+}
+
+# Transient gateway errors get a couple of backed-off retries
+FETCH_RETRIES = 2
+RETRY_STATUSES = frozenset({502, 503, 504})
+RETRY_BACKOFF = 0.3 # Seconds before the first retry, doubled for each further one
+# Batch endpoints fetch several pages at once; cap both the request size and the load put on the origin
+MAX_BATCH_PAGES = 20
+MAX_BATCH_CONCURRENCY = 10
+# BeautifulSoup parsing is CPU-bound; it runs on this pool so the event loop keeps serving other requests
+PARSE_POOL = ThreadPoolExecutor(max_workers=32)
+# Listing pages change on the minute scale, so parsed results are reused for a minute
+PAGE_TTL = 60
+# Entries are (expiry time, result), see ttl_cached
+PAGE_CACHE = TTLCache(maxsize=512, ttl=PAGE_TTL)
+# Serialized bodies of successful listing responses, keyed by path + query string: (ETag, body, media type, expiry time)
+RESPONSE_CACHE = TLRUCache(maxsize=512, ttu=lambda key, value, now: value[3])
+# Earliest expiry of the PAGE_CACHE results used by the request being handled, as a one-item list: set by
+# serve_cached_responses, lowered by ttl_cached from inside the handler
+RESPONSE_EXPIRY: ContextVar[Optional[List[float]]] = ContextVar('RESPONSE_EXPIRY', default=None)
+# Scrapes currently running, by PAGE_CACHE key
+IN_FLIGHT: Dict[tuple, "asyncio.Future[Any]"] = {}
+# Once a cached result expires, scrapes whose page came with an ETag/Last-Modified are revalidated with a
+# conditional GET: PAGE_CACHE key -> (request validators, scraped result). A 304 reuses the result, skipping
+# download, parse and extraction. Only the extracted models are kept, never the parsed documents
+VALIDATED_RESULTS = LRUCache(maxsize=1024)
+
+# --- Precompiled XPath Selectors ---
+# Video listings are walked in C by libxml2 rather than by BeautifulSoup; compiled once at import.
+
+def has_class(class_name: str) -> str:
+    """XPath predicate matching elements whose class attribute contains `class_name` as a whole token."""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')"
+
+GALLERY_LIST_XPATH = etree.XPath(f"(//div[@id='galleries'][{has_class('js-gallery-list')}])[1]")
+NO_RESULTS_XPATH = etree.XPath(f"(//div[{has_class('b-catalog-info-descr')}])[1]")
+# Random-thumb items (ads, suggestions) are excluded by the selector itself
+VIDEO_ITEMS_XPATH = etree.XPath(f".//div[{has_class('b-thumb-item')}][not({has_class('random-thumb')})]")
+
+ITEM_TITLE_XPATH = etree.XPath(f"(.//div[{has_class('b-thumb-item__title')}])[1]")
+ITEM_DURATION_SPAN_XPATH = etree.XPath(f"(.//div[{has_class('b-thumb-item__duration')}])[1]/descendant::span[1]")
+ITEM_GALLERY_LINK_XPATH = etree.XPath(f"(.//a[{has_class('js-gallery-link')}])[1]")
+ITEM_TAG_LINKS_XPATH = etree.XPath(f"(.//div[{has_class('b-thumb-item__detail')}])[1]//a")
+
+ITEM_GALLERY_PICTURE_XPATH = etree.XPath(f"(.//picture[{has_class('js-gallery-img')}])[1]")
+ITEM_PICTURE_XPATH = etree.XPath("(.//picture)[1]")
+PICTURE_WEBP_XPATH = etree.XPath("(.//source[@type='image/webp'])[1]")
+PICTURE_JPEG_XPATH = etree.XPath("(.//source[@type='image/jpeg'])[1]")
+PICTURE_IMG_XPATH = etree.XPath("(.//img)[1]")
+
+# POST /scrape-videos: generic listing items ('div.b-thumb-item.js-thumb-item.js-thumb', minus random-thumb ads),
+# their title/link elements, and the page checks used when no item was found
+JS_THUMB_ITEMS_XPATH = etree.XPath(
+    f"//div[{has_class('b-thumb-item')}][{has_class('js-thumb-item')}][{has_class('js-thumb')}][not({has_class('random-thumb')})]"
+)
+ITEM_JS_TITLE_XPATH = etree.XPath(f"(.//div[{has_class('b-thumb-item__title')}][{has_class('js-gallery-title')}])[1]")
+ITEM_STATS_LINK_XPATH = etree.XPath(f"(.//a[{has_class('js-gallery-stats')}][{has_class('js-gallery-link')}])[1]")
+ANY_GALLERIES_XPATH = etree.XPath("(//div[@id='galleries'])[1]")
+ANY_THUMB_ITEM_XPATH = etree.XPath(f"(//div[{has_class('b-thumb-item')}])[1]")
+
+# One trimmed, non-empty entry of a comma-separated data-preview list, extracted in a single findall pass
+SPRITE_RE = re.compile(r'[^,\s][^,]*[^,\s]|[^,\s]')
+# Video pages on the site itself (http or https, optional www), e.g. https://hqporn.xxx/video-title_123.html.
+# Anything else is rejected before any upstream request is made
+VIDEO_PAGE_URL_RE = re.compile(r'https?://(?:www\.)?' + re.escape(BASE_URL.split('://', 1)[1]) + r'/[^\s?#]+\.html')
+
+class AnyOfStrainer(SoupStrainer):
+    """Keeps the elements matched by any of `strainers`, with everything inside them. One SoupStrainer
+    ANDs its name and attribute rules, so alternatives with different attributes need one strainer each."""
+
+    def __init__(self, *strainers: SoupStrainer):
+        super().__init__()
+        self.strainers = strainers
+
+    def allow_tag_creation(self, nsprefix: Optional[str], name: str, attrs: Optional[Dict[str, str]]) -> bool:
+        return any(strainer.allow_tag_creation(nsprefix, name, attrs) for strainer in self.strainers)
+
+    def allow_string_creation(self, string: str) -> bool:
+        return False # Text outside the kept elements is never read
+
+# BeautifulSoup only builds the parts of a page a scraper reads: the '#galleries' container on the
+# category/pornstar/channel listings, and on video pages the player div plus any <video> outside it, where
+# video#video_html5_api may sit (with their <source> children). The class is still the raw attribute string while strained, so the
+# player div is matched by a class-token regex
+GALLERY_STRAINER = SoupStrainer('div', id='galleries')
+VIDEO_STRAINER = AnyOfStrainer(
+    SoupStrainer('div', class_=re.compile(r'(?:^|\s)b-video-player(?:\s|$)')), SoupStrainer('video'))
+
 # --- Pydantic Models ---
 # These define the expected structure of request bodies and response data
+# Scrapers build them with model_construct: the scraped values are already plain strings, and FastAPI
+# still checks responses against response_model when serializing them
 
 class ImageUrls(BaseModel):
     """Model for image URLs associated with items (videos, categories, etc.)"""
@@ -102,21 +274,220 @@ class StreamData(BaseModel):
 
 # --- Helper Scraping Functions ---
 
-def safe_scrape_page(url: str) -> Optional[BeautifulSoup]:
-    """Fetches a URL and returns a BeautifulSoup object or None on error."""
+class Revalidation:
+    """The validators a cached scrape sends with its page request, and the ones the site answers with."""
+    __slots__ = ('sent', 'received')
+
+    def __init__(self, sent: Dict[str, str]):
+        self.sent = sent
+        self.received: Dict[str, str] = {}
+
+class NotModified(Exception):
+    """Raised by fetch_and_parse when the site answers a conditional GET with 304 Not Modified."""
+
+# Set by ttl_cached for the scrape it runs; fetch_and_parse sends and records the page's validators through it
+REVALIDATION: ContextVar[Optional[Revalidation]] = ContextVar('REVALIDATION', default=None)
+
+def finish_in_flight(key: tuple, task: "asyncio.Future[Any]") -> None:
+    """Done-callback of an IN_FLIGHT scrape. Also retrieves a failure, so that when every caller waiting on the
+    scrape was cancelled asyncio doesn't report it as 'Task exception was never retrieved'."""
+    IN_FLIGHT.pop(key, None)
+    if not task.cancelled():
+        task.exception()
+
+def ttl_cached(cache: TTLCache):
+    """Caches the result of an async scraper in `cache`, keyed by its bound arguments.
+    Hits skip both the HTTP fetch and the parse; callers get a shallow copy so they can't mutate the cached value.
+    Concurrent misses for the same key share one in-flight scrape instead of each fetching the page.
+    A miss whose page was validated before revalidates it, and a 304 reuses the result kept in VALIDATED_RESULTS.
+    Entries are stored with their expiry time, which also caps the current request's RESPONSE_EXPIRY."""
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        async def scrape_and_cache(key: tuple, args: tuple, kwargs: dict) -> Any:
+            validated = VALIDATED_RESULTS.get(key)
+            revalidation = Revalidation(validated[0] if validated else {})
+            REVALIDATION.set(revalidation) # Runs in its own task, so this is only seen by this scrape
+            try:
+                result = await func(*args, **kwargs)
+            except NotModified:
+                result = validated[1]
+            else:
+                if revalidation.received:
+                    VALIDATED_RESULTS[key] = (revalidation.received, result)
+            entry = cache[key] = (cache.timer() + cache.ttl, result)
+            return entry
+
+        def use(entry: tuple) -> Any:
+            expires, result = entry
+            response_expiry = RESPONSE_EXPIRY.get()
+            if response_expiry is not None and expires < response_expiry[0]:
+                response_expiry[0] = expires
+            return copy.copy(result)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            # Bound arguments, so positional and keyword calls share an entry
+            key = (func.__name__,) + tuple(signature.bind(*args, **kwargs).arguments.items())
+            entry = cache.get(key)
+            if entry is not None:
+                return use(entry)
+
+            task = IN_FLIGHT.get(key)
+            if task is None:
+                task = asyncio.ensure_future(scrape_and_cache(key, args, kwargs))
+                IN_FLIGHT[key] = task
+                task.add_done_callback(functools.partial(finish_in_flight, key))
+            # Shielded: one caller disconnecting must not cancel the scrape the others are waiting on
+            return use(await asyncio.shield(task))
+        return wrapper
+    return decorator
+
+@asynccontextmanager
+async def open_page(url: str, timeout: float = 15, headers: Optional[Dict[str, str]] = None) -> AsyncIterator[httpx.Response]:
+    """Opens a streamed GET with the shared client, retrying transient gateway errors.
+    The body is left unread so callers can consume it as it arrives. Raises httpx.HTTPError on failure."""
+    for attempt in range(FETCH_RETRIES + 1):
+        async with CLIENT.stream("GET", url, timeout=timeout, headers=headers) as response:
+            if response.status_code not in RETRY_STATUSES or attempt == FETCH_RETRIES:
+                if response.status_code != 304: # Not Modified answers a conditional GET; the caller handles it
+                    response.raise_for_status()  # Raise HTTPStatusError for bad responses (4xx or 5xx)
+                yield response
+                return
+        await asyncio.sleep(RETRY_BACKOFF * 2 ** attempt)
+
+async def run_parse(func: Callable[..., T], *args: Any) -> T:
+    """Runs a CPU-bound parse/extract step on PARSE_POOL so it never blocks the event loop."""
+    return await asyncio.get_running_loop().run_in_executor(PARSE_POOL, func, *args)
+
+def parse_soup(content: bytes, parse_only: Optional[SoupStrainer] = None) -> BeautifulSoup:
+    """Parses a page body into a BeautifulSoup object, optionally keeping only the elements matched by `parse_only`."""
+    return BeautifulSoup(content, 'lxml', parse_only=parse_only)
+
+async def read_soup(response: httpx.Response, parse_only: Optional[SoupStrainer] = None) -> BeautifulSoup:
+    """Reads a streamed response and parses it into a BeautifulSoup object, optionally keeping only the
+    elements matched by `parse_only`."""
+    content = await response.aread()
+    return await run_parse(parse_soup, content, parse_only)
+
+def feed_tree(chunks: "queue.SimpleQueue[Optional[bytes]]", encoding: Optional[str] = None) -> lxml_html.HtmlElement:
+    """Feeds body chunks to an lxml HTMLParser as they are queued, until a None, and returns the tree.
+    Runs as one PARSE_POOL job, so the parser is only ever used from a single thread."""
+    # A fresh parser per page: lxml parsers must not be shared between threads
+    parser = lxml_html.HTMLParser(encoding=encoding)
+    for chunk in iter(chunks.get, None):
+        parser.feed(chunk)
+    try:
+        root = parser.close()
+    except etree.XMLSyntaxError: # Nothing was fed: empty body
+        root = None
+    return root if root is not None else lxml_html.Element('html') # Empty body -> empty document
+
+async def read_tree(response: httpx.Response) -> lxml_html.HtmlElement:
+    """Parses a streamed response into an lxml HTML tree as the body arrives: the event loop queues each
+    64 KiB chunk for feed_tree on PARSE_POOL, so parsing overlaps the network reads without blocking the loop,
+    and the raw page is never joined into one bytes object."""
+    chunks = queue.SimpleQueue()
+    # Submitted before the first chunk arrives (run_parse would only submit it once awaited)
+    parsed = asyncio.get_running_loop().run_in_executor(PARSE_POOL, feed_tree, chunks, response.charset_encoding)
+    try:
+        async for chunk in response.aiter_bytes(65536):
+            chunks.put(chunk)
+    finally:
+        chunks.put(None) # Also when the download fails, so the pool thread is released
+    return await parsed
+
+def response_validators(response: httpx.Response) -> Dict[str, str]:
+    """Conditional request headers that revalidate `response` (empty if the site sent no validators)."""
+    validators = {}
+    if 'ETag' in response.headers:
+        validators['If-None-Match'] = response.headers['ETag']
+    if 'Last-Modified' in response.headers:
+        validators['If-Modified-Since'] = response.headers['Last-Modified']
+    return validators
+
+async def fetch_and_parse(url: str, read: Callable[[httpx.Response], Awaitable[T]], timeout: float = 15) -> T:
+    """Fetches a URL and parses the body with `read` (read_tree parses it while it streams in, read_soup once
+    it is complete). Raises HTTPException on error.
+    Within a ttl_cached scrape the page is requested with the validators it was last served with (if any),
+    and NotModified is raised when the site answers 304; the new validators are recorded for the next time."""
     logger.info(f"Fetching: {url}")
+    revalidation = REVALIDATION.get()
     try:
-        response = requests.get(url, headers=HEADERS, timeout=15)
-        response.raise_for_status()  # Raise HTTPError for bad responses (4xx or 5xx)
-        return BeautifulSoup(response.content, 'html.parser')
-    except requests.exceptions.RequestException as e:
+        async with open_page(url, timeout=timeout, headers=revalidation.sent if revalidation else None) as response:
+            if revalidation is not None:
+                if revalidation.sent and response.status_code == 304:
+                    logger.info(f"Not modified: {url}")
+                    raise NotModified(url)
+                revalidation.received = response_validators(response)
+            return await read(response)
+    except NotModified:
+        raise # Handled by ttl_cached
+    except httpx.HTTPError as e:
         logger.error(f"Error fetching {url}: {e}")
-        # Raising HTTPException here simplifies error handling in endpoints
-        raise HTTPException(status_code=500, detail=f"Failed to fetch or parse URL: {url} - {str(e)}")
+        # Raising HTTPException here simplifies error handling in endpoints; a missing page stays a 404
+        missing = isinstance(e, httpx.HTTPStatusError) and e.response.status_code == 404
+        raise HTTPException(status_code=404 if missing else 500, detail=f"Failed to fetch or parse URL: {url} - {str(e)}")
     except Exception as e:
         logger.error(f"An unexpected error occurred during scraping {url}: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"An internal error occurred while scraping {url}: {str(e)}")
 
+async def safe_scrape_page(url: str, parse_only: Optional[SoupStrainer] = None) -> BeautifulSoup:
+    """Fetches a URL and returns a BeautifulSoup object. Raises HTTPException on error."""
+    return await fetch_and_parse(url, functools.partial(read_soup, parse_only=parse_only))
+
+async def safe_scrape_tree(url: str, timeout: float = 15) -> lxml_html.HtmlElement:
+    """Fetches a URL and returns an lxml HTML tree. Raises HTTPException on error."""
+    return await fetch_and_parse(url, read_tree, timeout)
+
+def listing_url(kind: str, page_number: int, **fields: str) -> str:
+    """Builds the site URL of a listing page from URL_TMPL."""
+    first_page, later_pages = URL_TMPL[kind]
+    return (first_page if page_number == 1 else later_pages).format(base=BASE_URL, page=page_number, **fields)
+
+@functools.lru_cache(maxsize=4096)
+def absolute_url(href: Optional[str]) -> Optional[str]:
+    """Prefixes site-relative hrefs ('/path') with BASE_URL and gives protocol-relative ones ('//host/path')
+    BASE_URL's scheme; other hrefs (and None) are returned unchanged. app.absolute_url follows the same rule.
+    Cached because the same tag/category hrefs repeat across the items of a page and across pages."""
+    if href is None or href[:1] != '/': # Slicing avoids a startswith method call
+        return href
+    return urljoin(BASE_URL, href) if href[:2] == '//' else BASE_URL + href
+
+def first(nodes: list) -> Any:
+    """Returns the first result of a compiled XPath, or None if it matched nothing."""
+    return nodes[0] if nodes else None
+
+def element_text(element: Optional[lxml_html.HtmlElement]) -> str:
+    """Equivalent of BeautifulSoup's get_text(strip=True) for an lxml element ('' for None)."""
+    if element is None:
+        return ""
+    if not len(element): # Leaf element (the common case): its text is the only text node
+        return (element.text or "").strip()
+    return "".join(text.strip() for text in element.itertext())
+
+def tag_text(tag: Optional[Any]) -> str:
+    """get_text(strip=True) for a BeautifulSoup tag ('' for None), reading .string directly when the tag
+    wraps a single text node instead of walking and joining its descendants."""
+    if tag is None:
+        return ""
+    string = tag.string
+    if type(string) is NavigableString: # Not None (mixed content) or a Comment/CData subclass
+        return string.strip()
+    return tag.get_text(strip=True)
+
+def log_skipped_item(message: str, item: Any) -> None:
+    """Warns about a skipped listing item (a BeautifulSoup tag or an lxml element). Its HTML is only
+    serialized into the message when DEBUG logging is enabled, since pretty-printing walks the whole subtree."""
+    if logger.isEnabledFor(logging.DEBUG):
+        if isinstance(item, lxml_html.HtmlElement):
+            item_html = lxml_html.tostring(item, encoding='unicode', pretty_print=True)
+        else:
+            item_html = item.prettify()
+        logger.warning(f"{message}: {item_html}")
+    else:
+        logger.warning(f"{message} (enable DEBUG logging for the item's HTML)")
+
 def extract_image_urls(item_soup: BeautifulSoup) -> ImageUrls:
     """Extracts ImageUrls model from an item's BeautifulSoup element."""
     picture_tag = item_soup.find('picture', class_='js-gallery-img')
@@ -137,62 +508,68 @@ def extract_image_urls(item_soup: BeautifulSoup) -> ImageUrls:
              # Prioritize data-src for lazy loading, fallback to src
             img_urls_data['img_src'] = img_tag.get('data-src', img_tag.get('src'))
 
-    return ImageUrls(**img_urls_data)
+    return ImageUrls.model_construct(**img_urls_data)
 
-def scrape_generic_video_list_page(section: str, page_number: int) -> List[VideoData]:
-    """Scrapes lists of videos from pages like /fresh, /best, /trend."""
-    # Adjust URL structure based on section and page number
-    # /fresh/{page}/, /best/{page}/, /trend/{page}
-    if page_number <= 0:
-        raise HTTPException(status_code=400, detail="Page number must be positive.")
+def extract_image_urls_from_element(item: lxml_html.HtmlElement) -> ImageUrls:
+    """Extracts ImageUrls model from an item's lxml element."""
+    picture_tag = first(ITEM_GALLERY_PICTURE_XPATH(item))
+    if picture_tag is None:
+         picture_tag = first(ITEM_PICTURE_XPATH(item)) # Fallback for other item types
 
-    if section == "trend":
-         scrape_url = f"{BASE_URL}/trend/{page_number}" # No trailing slash seems common here
-    elif page_number == 1:
-         scrape_url = f"{BASE_URL}/{section}/" # Trailing slash for page 1 often
-    else:
-         scrape_url = f"{BASE_URL}/{section}/{page_number}/" # Trailing slash for other pages
-
-    soup = safe_scrape_page(scrape_url) # This raises HTTPException on failure
+    img_urls_data = {}
+    if picture_tag is not None:
+        source_webp = first(PICTURE_WEBP_XPATH(picture_tag))
+        img_urls_data['webp'] = source_webp.get('srcset') if source_webp is not None else None
 
-    # Find the main container for gallery items
-    gallery_list_container = soup.find('div', id='galleries', class_='js-gallery-list')
+        source_jpeg = first(PICTURE_JPEG_XPATH(picture_tag))
+        img_urls_data['jpeg'] = source_jpeg.get('srcset') if source_jpeg is not None else None
 
-    if not gallery_list_container:
-        logger.warning(f"Gallery list container not found on {scrape_url}. No items found?")
-        return [] # Indicate no items found, not necessarily an error
-
-    items = gallery_list_container.find_all('div', class_='b-thumb-item')
+        img_tag = first(PICTURE_IMG_XPATH(picture_tag))
+        if img_tag is not None:
+             # Prioritize data-src for lazy loading, fallback to src
+            img_urls_data['img_src'] = img_tag.get('data-src', img_tag.get('src'))
 
-    if not items:
-        logger.info(f"No video items found on {scrape_url}.")
-        return [] # Indicate no items found
+    return ImageUrls.model_construct(**img_urls_data)
 
+def extract_tags(item: lxml_html.HtmlElement) -> List[Tag]:
+    """Builds the Tag list from an item's tag links, skipping links without an href or text."""
+    tags = []
+    for link_a in ITEM_TAG_LINKS_XPATH(item):
+        # One attribute lookup and one text walk per link
+        href = link_a.get('href')
+        if not href:
+            continue
+        name = element_text(link_a)
+        if not name:
+            continue
+        # The same few tag names repeat on every item; interning lets cached pages share one string per name
+        # (links are already shared through absolute_url's cache)
+        tags.append(Tag.model_construct(link=absolute_url(href), name=sys.intern(name)))
+    return tags
+
+def parse_video_items(items: List[lxml_html.HtmlElement], scrape_url: str) -> List[VideoData]:
+    """Builds VideoData models from 'div.b-thumb-item' elements, skipping items with neither link nor title.
+    Shared by the generic listing and search scrapers."""
     videos = []
     for item in items:
-        # Skip random thumb items (e.g., ads) - added from input_file_0 logic
-        if "random-thumb" in item.get("class", []):
-            continue
-
         # Extract data following input_file_0/Flask app patterns
-        title_elem = item.find("div", class_="b-thumb-item__title")
-        title = title_elem.get_text(strip=True) if title_elem else None
+        title_elem = first(ITEM_TITLE_XPATH(item))
+        title = element_text(title_elem) if title_elem is not None else None
         title_attribute = None # Initial assumption
 
-        duration_elem = item.find("div", class_="b-thumb-item__duration")
-        duration_span = duration_elem.find("span") if duration_elem else None
-        duration = duration_span.get_text(strip=True) if duration_span else None
+        duration_span = first(ITEM_DURATION_SPAN_XPATH(item))
+        duration = element_text(duration_span) if duration_span is not None else None
 
-        image_urls_data = extract_image_urls(item) # Use the helper function
+        image_urls_data = extract_image_urls_from_element(item) # Use the helper function
 
         link = None
         gallery_id = None
         thumb_id = None
         preview_video_url = None
-        link_elem = item.find("a", class_="js-gallery-link")
-        if link_elem:
+        link_elem = first(ITEM_GALLERY_LINK_XPATH(item))
+        if link_elem is not None:
             href = link_elem.get("href")
-            link = f"{BASE_URL}{href}" if href and href.startswith('/') else href
+            link = absolute_url(href)
             gallery_id = link_elem.get("data-gallery-id")
             thumb_id = link_elem.get("data-thumb-id")
             preview_video_url = link_elem.get("data-preview")
@@ -203,23 +580,12 @@ def scrape_generic_video_list_page(section: str, page_number: int) -> List[Video
             title = title_attribute
 
         # Extract tags
-        categories_elem = item.find("div", class_="b-thumb-item__detail")
-        tags = []
-        if categories_elem:
-            # Check if it's just views/stats like "5M views", or actual tags
-            # The Flask scraper looks for 'a' tags within detail.
-            tag_links = categories_elem.find_all("a")
-            tags = [
-                Tag(
-                    link=f"{BASE_URL}{link_a['href']}" if link_a.get('href', '').startswith('/') else link_a.get('href'),
-                    name=link_a.get_text(strip=True)
-                )
-                for link_a in tag_links if link_a.get('href') and link_a.get_text(strip=True) # Ensure link and text are present
-            ]
+        # The Flask scraper looks for 'a' tags within the detail div.
+        tags = extract_tags(item)
 
         # Ensure minimum data for a valid video item before appending
         if link or title:
-             video = VideoData(
+             video = VideoData.model_construct(
                  duration=duration,
                  gallery_id=gallery_id,
                  image_urls=image_urls_data,
@@ -232,12 +598,96 @@ def scrape_generic_video_list_page(section: str, page_number: int) -> List[Video
              )
              videos.append(video)
         else:
-             logger.warning(f"Skipping video item due to missing link and title: {item.prettify()}")
+             log_skipped_item(f"Skipping video item from {scrape_url} due to missing link and title", item)
+
+    return videos
+
+def parse_thumb_items(items: List[lxml_html.HtmlElement], source_url: str) -> List[VideoData]:
+    """Builds VideoData models from the 'js-thumb-item' elements of an arbitrary page (POST /scrape-videos),
+    skipping items with neither link nor title."""
+    videos = []
+    for item in items:
+        # --- Extract data - replicating logic from original scrape_videos ---
+        title_elem = first(ITEM_JS_TITLE_XPATH(item))
+        title = element_text(title_elem) if title_elem is not None else None
+        title_attribute = title # Initial assumption, will be overridden by link tag title if available
+
+        duration_span = first(ITEM_DURATION_SPAN_XPATH(item))
+        duration = element_text(duration_span) if duration_span is not None else None
+
+        image_urls_data = extract_image_urls_from_element(item) # Use helper
+
+        link = None
+        gallery_id = None
+        thumb_id = None
+        preview_video_url = None
+        link_elem = first(ITEM_STATS_LINK_XPATH(item))
+        if link_elem is not None:
+            href = link_elem.get("href")
+            # Original added hqporn.xxx if relative link. Be cautious if URL isn't from base.
+            # Assume internal relative link needs BASE_URL prepended.
+            link = absolute_url(href)
+            gallery_id = link_elem.get("data-gallery-id")
+            thumb_id = link_elem.get("data-thumb-id")
+            preview_video_url = link_elem.get("data-preview")
+            link_title_attribute = link_elem.get("title")
+            if link_title_attribute:
+                title_attribute = link_title_attribute # Use the title from the link tag if available
 
+        # Final decision on video title
+        if not title: # If title was missing from the specific title div
+             title = title_attribute # Use link tag title
+
+        # Extract tags
+        tags = extract_tags(item)
+
+        # Ensure minimum data before creating model
+        if link or title:
+            video = VideoData.model_construct(
+                duration=duration,
+                gallery_id=gallery_id,
+                image_urls=image_urls_data,
+                link=link,
+                preview_video_url=preview_video_url,
+                tags=tags,
+                thumb_id=thumb_id,
+                title=title,
+                title_attribute=title_attribute # Include attribute for completeness
+            )
+            videos.append(video)
+        else:
+            log_skipped_item(f"Skipping item scraped from {source_url} due to missing link/title", item)
 
     return videos
 
-def scrape_search_page(search_content: str, page_number: int) -> List[VideoData]:
+@ttl_cached(PAGE_CACHE)
+async def scrape_generic_video_list_page(section: str, page_number: int) -> List[VideoData]:
+    """Scrapes lists of videos from pages like /fresh, /best, /trend."""
+    # URL structure per section and page number comes from URL_TMPL: /fresh/{page}/, /best/{page}/, /trend/{page}
+    if page_number <= 0:
+        raise HTTPException(status_code=400, detail="Page number must be positive.")
+
+    scrape_url = listing_url(section, page_number)
+
+    tree = await safe_scrape_tree(scrape_url) # This raises HTTPException on failure
+
+    # Find the main container for gallery items
+    gallery_list_container = first(GALLERY_LIST_XPATH(tree))
+
+    if gallery_list_container is None:
+        logger.warning(f"Gallery list container not found on {scrape_url}. No items found?")
+        return [] # Indicate no items found, not necessarily an error
+
+    items = VIDEO_ITEMS_XPATH(gallery_list_container)
+
+    if not items:
+        logger.info(f"No video items found on {scrape_url}.")
+        return [] # Indicate no items found
+
+    return await run_parse(parse_video_items, items, scrape_url)
+
+@ttl_cached(PAGE_CACHE)
+async def scrape_search_page(search_content: str, page_number: int) -> List[VideoData]:
      """Scrapes search results pages."""
      if page_number <= 0:
          raise HTTPException(status_code=400, detail="Page number must be positive.")
@@ -247,110 +697,44 @@ def scrape_search_page(search_content: str, page_number: int) -> List[VideoData]
      # Ensure search content is URL-encoded for the path
      safe_search_content = quote(search_content)
 
-     # Search page URL structure: /search/term/ or /search/term/{page}/
-     if page_number == 1:
-         scrape_url = f"{BASE_URL}/search/{safe_search_content}/"
-     else:
-         scrape_url = f"{BASE_URL}/search/{safe_search_content}/{page_number}/"
+     scrape_url = listing_url("search", page_number, query=safe_search_content)
 
 
-     soup = safe_scrape_page(scrape_url) # This raises HTTPException on failure
+     tree = await safe_scrape_tree(scrape_url) # This raises HTTPException on failure
 
      # Check for explicit "No results found" message - adapted from input_file_1
-     no_results_message = soup.find('div', class_='b-catalog-info-descr')
-     if no_results_message and "no results found" in no_results_message.get_text(strip=True).lower():
+     no_results_message = first(NO_RESULTS_XPATH(tree))
+     if no_results_message is not None and "no results found" in element_text(no_results_message).lower():
           logger.info(f"Site reported 'No results found' for '{search_content}' on {scrape_url}")
           # Returning an empty list is generally better than 404 for search results,
           # as an empty result is a valid outcome.
           return []
 
-     gallery_list_container = soup.find('div', id='galleries', class_='js-gallery-list')
+     gallery_list_container = first(GALLERY_LIST_XPATH(tree))
 
-     if not gallery_list_container:
+     if gallery_list_container is None:
          logger.warning(f"Gallery list container not found on {scrape_url}. No items found?")
          return [] # Indicate no items found
 
-     items = gallery_list_container.find_all('div', class_='b-thumb-item')
+     items = VIDEO_ITEMS_XPATH(gallery_list_container)
 
      if not items:
          logger.info(f"No video items found on {scrape_url} (after checking for no results message).")
          return [] # Indicate no items found
 
+     # The item parsing logic is identical to generic video lists
+     return await run_parse(parse_video_items, items, scrape_url)
 
-     # The item parsing logic is identical to generic video lists, reuse or replicate
-     # Replicating for now, could refactor later
-     videos = []
-     for item in items:
-        if "random-thumb" in item.get("class", []):
-            continue
-
-        title_elem = item.find("div", class_="b-thumb-item__title")
-        title = title_elem.get_text(strip=True) if title_elem else None
-        title_attribute = None
-
-        duration_elem = item.find("div", class_="b-thumb-item__duration")
-        duration_span = duration_elem.find("span") if duration_elem else None
-        duration = duration_span.get_text(strip=True) if duration_span else None
 
-        image_urls_data = extract_image_urls(item)
-
-        link = None
-        gallery_id = None
-        thumb_id = None
-        preview_video_url = None
-        link_elem = item.find("a", class_="js-gallery-link")
-        if link_elem:
-            href = link_elem.get("href")
-            link = f"{BASE_URL}{href}" if href and href.startswith('/') else href
-            gallery_id = link_elem.get("data-gallery-id")
-            thumb_id = link_elem.get("data-thumb-id")
-            preview_video_url = link_elem.get("data-preview")
-            title_attribute = link_elem.get("title")
-
-        if not title:
-            title = title_attribute
-
-        categories_elem = item.find("div", class_="b-thumb-item__detail")
-        tags = []
-        if categories_elem:
-            tag_links = categories_elem.find_all("a")
-            tags = [
-                Tag(
-                    link=f"{BASE_URL}{link_a['href']}" if link_a.get('href', '').startswith('/') else link_a.get('href'),
-                    name=link_a.get_text(strip=True)
-                )
-                for link_a in tag_links if link_a.get('href') and link_a.get_text(strip=True)
-            ]
-
-        if link or title:
-             video = VideoData(
-                 duration=duration,
-                 gallery_id=gallery_id,
-                 image_urls=image_urls_data,
-                 link=link,
-                 preview_video_url=preview_video_url,
-                 tags=tags,
-                 thumb_id=thumb_id,
-                 title=title,
-                 title_attribute=title_attribute
-             )
-             videos.append(video)
-        else:
-             logger.warning(f"Skipping search result item due to missing link and title: {item.prettify()}")
-
-     return videos
-
-
-def scrape_category_list_page(page_number: int) -> List[CategoryData]:
+@ttl_cached(PAGE_CACHE)
+async def scrape_category_list_page(page_number: int) -> List[CategoryData]:
     """Scrapes the categories listing pages."""
     if page_number <= 0:
         raise HTTPException(status_code=400, detail="Page number must be positive.")
 
-    scrape_url = f"{BASE_URL}/categories/{page_number}"
-    if page_number == 1:
-        scrape_url = f"{BASE_URL}/categories/" # Page 1 structure
+    scrape_url = listing_url("categories", page_number)
 
-    soup = safe_scrape_page(scrape_url) # This raises HTTPException on failure
+    soup = await safe_scrape_page(scrape_url, parse_only=GALLERY_STRAINER) # This raises HTTPException on failure
 
     # Main container for categories
     category_list_container = soup.find('div', id='galleries', class_='js-category-list')
@@ -374,44 +758,43 @@ def scrape_category_list_page(page_number: int) -> List[CategoryData]:
         title = None # Primary title source
         if link_tag:
             href_relative = link_tag.get('href')
-            link = f"{BASE_URL}{href_relative}" if href_relative and href_relative.startswith('/') else href_relative
+            link = absolute_url(href_relative)
             category_id = link_tag.get('data-category-id')
             title = link_tag.get('title', '').strip() # Use <a> title primarily
 
         # Fallback/override title from the dedicated div
         title_div = item_soup.find('div', class_='b-thumb-item__title')
-        if title_div and title_div.get_text(strip=True):
-             # If <a> title was empty or less descriptive, use div title
-            if not title or len(title) < len(title_div.get_text(strip=True)):
-                 title = title_div.get_text(strip=True)
+        div_text = tag_text(title_div) # Computed once: may walk the subtree
+        # If <a> title was empty or less descriptive, use div title
+        if div_text and (not title or len(title) < len(div_text)):
+            title = div_text
 
 
         image_urls = extract_image_urls(item_soup) # Use helper function
 
         if link and title: # Ensure essential data is present
-            scraped_data.append(CategoryData(
+            scraped_data.append(CategoryData.model_construct(
                 link=link,
                 category_id=category_id,
                 title=title,
                 image_urls=image_urls
             ))
         else:
-            logger.warning(f"Skipping category item due to missing title or link: {item_soup.prettify()}")
+            log_skipped_item("Skipping category item due to missing title or link", item_soup)
 
 
     return scraped_data
 
 
-def scrape_pornstar_list_page(page_number: int) -> List[PornstarData]:
+@ttl_cached(PAGE_CACHE)
+async def scrape_pornstar_list_page(page_number: int) -> List[PornstarData]:
     """Scrapes the pornstar listing pages."""
     if page_number <= 0:
         raise HTTPException(status_code=400, detail="Page number must be positive.")
 
-    scrape_url = f"{BASE_URL}/pornstars/{page_number}/" # Pages usually have trailing slash
-    if page_number == 1:
-        scrape_url = f"{BASE_URL}/pornstars/" # First page often has no page number
+    scrape_url = listing_url("pornstars", page_number)
 
-    soup = safe_scrape_page(scrape_url) # This raises HTTPException on failure
+    soup = await safe_scrape_page(scrape_url, parse_only=GALLERY_STRAINER) # This raises HTTPException on failure
 
     # Main container for pornstars
     pornstar_list_container = soup.find('div', id='galleries', class_='js-pornstar-list')
@@ -440,40 +823,38 @@ def scrape_pornstar_list_page(page_number: int) -> List[PornstarData]:
         name = None # Primary name source
         if link_tag:
             href_relative = link_tag.get('href')
-            link = f"{BASE_URL}{href_relative}" if href_relative and href_relative.startswith('/') else href_relative
+            link = absolute_url(href_relative)
             pornstar_id = link_tag.get('data-pornstar-id')
             name = link_tag.get('title', '').strip() # Use <a> title primarily
 
         # Fallback for name from div if needed
         title_div = item_soup.find('div', class_='b-thumb-item__title')
-        if title_div and title_div.get_text(strip=True):
-             if not name: # Only use div title if <a> title was missing
-                  name = title_div.get_text(strip=True)
+        if not name and title_div: # Only use div title if <a> title was missing
+            name = tag_text(title_div) or name
 
         image_urls = extract_image_urls(item_soup) # Use helper function
 
         if link and name: # Ensure essential data is present
-             scraped_data.append(PornstarData(
+             scraped_data.append(PornstarData.model_construct(
                  link=link,
                  pornstar_id=pornstar_id,
                  name=name,
                  image_urls=image_urls
              ))
         else:
-             logger.warning(f"Skipping pornstar item due to missing name or link: {item_soup.prettify()}")
+             log_skipped_item("Skipping pornstar item due to missing name or link", item_soup)
 
     return scraped_data
 
-def scrape_channel_list_page(page_number: int) -> List[ChannelData]:
+@ttl_cached(PAGE_CACHE)
+async def scrape_channel_list_page(page_number: int) -> List[ChannelData]:
     """Scrapes the channel listing pages."""
     if page_number <= 0:
         raise HTTPException(status_code=400, detail="Page number must be positive.")
 
-    scrape_url = f"{BASE_URL}/channels/{page_number}/" # Pages usually have trailing slash
-    if page_number == 1:
-        scrape_url = f"{BASE_URL}/channels/" # First page often has no page number
+    scrape_url = listing_url("channels", page_number)
 
-    soup = safe_scrape_page(scrape_url) # This raises HTTPException on failure
+    soup = await safe_scrape_page(scrape_url, parse_only=GALLERY_STRAINER) # This raises HTTPException on failure
 
     # Main container for channels
     channel_list_container = soup.find('div', id='galleries', class_='js-channel-list')
@@ -501,7 +882,7 @@ def scrape_channel_list_page(page_number: int) -> List[ChannelData]:
         name = None # Primary name source
         if link_tag:
             href_relative = link_tag.get('href')
-            link = f"{BASE_URL}{href_relative}" if href_relative and href_relative.startswith('/') else href_relative
+            link = absolute_url(href_relative)
             channel_id = link_tag.get('data-channel-id')
             name = link_tag.get('title', '').strip() # Use <a> title primarily
 
@@ -509,36 +890,35 @@ def scrape_channel_list_page(page_number: int) -> List[ChannelData]:
         title_div = item_soup.find('div', class_='b-thumb-item__title')
         if title_div:
             title_span = title_div.find('span') # Text is often inside a span
-            if title_span and title_span.get_text(strip=True):
-                 span_name = title_span.get_text(strip=True)
-                 if not name or len(span_name) > len(name): # Prefer longer name if different
-                     name = span_name
+            span_name = tag_text(title_span)
+            if span_name and (not name or len(span_name) > len(name)): # Prefer longer name if different
+                name = span_name
 
 
         image_urls = extract_image_urls(item_soup) # Use helper function
 
         if link and name: # Ensure essential data is present
-             scraped_data.append(ChannelData(
+             scraped_data.append(ChannelData.model_construct(
                  link=link,
                  channel_id=channel_id,
                  name=name,
                  image_urls=image_urls
              ))
         else:
-             logger.warning(f"Skipping channel item due to missing name or link: {item_soup.prettify()}")
+             log_skipped_item("Skipping channel item due to missing name or link", item_soup)
 
     return scraped_data
 
 
-def scrape_video_stream_data(video_page_url: str) -> StreamData:
+async def scrape_video_stream_data(video_page_url: str) -> StreamData:
     """Scrapes a single video page for stream links, poster, and sprites."""
 
-    if not video_page_url or not video_page_url.startswith('http'):
+    if not video_page_url or not VIDEO_PAGE_URL_RE.fullmatch(video_page_url):
          raise HTTPException(status_code=400, detail=f"Invalid video page URL provided: {video_page_url}")
 
-    soup = safe_scrape_page(video_page_url) # This raises HTTPException on failure
+    soup = await safe_scrape_page(video_page_url, parse_only=VIDEO_STRAINER) # This raises HTTPException on failure
 
-    stream_data = StreamData(video_page_url=video_page_url) # Start with initial data
+    stream_data = StreamData.model_construct(video_page_url=video_page_url) # Start with initial data
 
     # Locate the main video tag - ID is preferred as it's specific
     video_tag = soup.find('video', id='video_html5_api')
@@ -561,21 +941,22 @@ def scrape_video_stream_data(video_page_url: str) -> StreamData:
         stream_data.main_video_src = video_tag['src']
 
     # Extract from <source> tags within the video tag
-    found_sources = set() # Use set to avoid duplicates
-    if stream_data.main_video_src:
-         found_sources.add(stream_data.main_video_src) # Add primary src if it exists
-
+    # Sources are deduplicated by (src, type), so one URL offered under two MIME types is kept twice
+    found_sources = set()
     for source_tag in video_tag.find_all('source'):
-        if source_tag.has_attr('src'):
-            src_url = source_tag['src']
-            # Only add source if not already seen and if src is not empty
-            if src_url and src_url not in found_sources:
-                 stream_data.source_tags.append(StreamSource(
-                     src=src_url,
-                     type=source_tag.get('type'),
-                     size=source_tag.get('size') # 'size' attribute exists on some source tags for quality
-                 ))
-                 found_sources.add(src_url)
+        src_url = source_tag.get('src')
+        # Skip empty sources and the primary src, which is already reported as main_video_src
+        if not src_url or src_url == stream_data.main_video_src:
+            continue
+        source_type = source_tag.get('type')
+        if (src_url, source_type) in found_sources:
+            continue
+        found_sources.add((src_url, source_type))
+        stream_data.source_tags.append(StreamSource.model_construct(
+            src=src_url,
+            type=source_type,
+            size=source_tag.get('size') # 'size' attribute exists on some source tags for quality
+        ))
 
     # Check if any sources were found - if not, the video might be JS loaded or page is different
     if not stream_data.main_video_src and not stream_data.source_tags:
@@ -590,10 +971,37 @@ def scrape_video_stream_data(video_page_url: str) -> StreamData:
     # Extract sprite previews from data-preview attribute on video_tag
     if video_tag.has_attr('data-preview'):
         sprite_string = video_tag['data-preview']
-        stream_data.sprite_previews = [sprite.strip() for sprite in sprite_string.split(',') if sprite.strip()]
+        stream_data.sprite_previews = SPRITE_RE.findall(sprite_string)
 
     return stream_data
 
+async def scrape_pages(scrape_page: Callable[[int], Awaitable[List[T]]], page_numbers: List[int]) -> List[T]:
+    """Runs `scrape_page` for several page numbers concurrently (at most MAX_BATCH_CONCURRENCY at a time)
+    and returns all their items in page order.
+    A page that doesn't exist (404) ends the batch: the items of the pages before it are returned, and those
+    after it are dropped, so asking past the last page isn't an error. Any other failure fails the whole batch."""
+    semaphore = asyncio.Semaphore(MAX_BATCH_CONCURRENCY)
+    async def scrape_one(page_number: int) -> List[T]:
+        async with semaphore:
+            return await scrape_page(page_number)
+
+    results = await asyncio.gather(*(scrape_one(p) for p in page_numbers), return_exceptions=True)
+    items = []
+    for page_items in results:
+        if isinstance(page_items, HTTPException) and page_items.status_code == 404:
+            break
+        if isinstance(page_items, BaseException):
+            raise page_items
+        items.extend(page_items)
+    return items
+
+def batch_page_numbers(start: int, count: int) -> List[int]:
+    """Returns the page numbers for a batch request, rejecting batches larger than MAX_BATCH_PAGES."""
+    if count > MAX_BATCH_PAGES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_PAGES} pages can be requested at once.")
+    return list(range(start, start + count))
+
+
 # --- API Endpoints ---
 
 @app.get("/")
@@ -606,9 +1014,11 @@ async def root():
             "/redoc": "ReDoc documentation.",
             "/scrape-videos": "POST - Scrape video data from a generic listing URL.",
             "/api/fresh/{page_number}": "GET - Scrape fresh videos by page number.",
+            "/api/fresh?start=1&count=5": "GET - Scrape several consecutive fresh video pages concurrently.",
             "/api/best/{page_number}": "GET - Scrape best-rated videos by page number.",
             "/api/trend/{page_number}": "GET - Scrape trending videos by page number.",
             "/api/search/{search_content}/{page_number}": "GET - Search for videos by content and page number.",
+            "/api/search/{search_content}?start=1&count=5": "GET - Search several consecutive result pages concurrently.",
             "/api/categories/{page_number}": "GET - Scrape categories list by page number.",
             "/api/pornstars/{page_number}": "GET - Scrape pornstars list by page number.",
             "/api/channels/{page_number}": "GET - Scrape channels list by page number.",
@@ -622,93 +1032,20 @@ async def scrape_videos_endpoint(request: ScrapeRequest):
     Scrape video data from the provided generic URL and return a list of video metadata.
     Suitable for URLs found from links to video lists within the site.
     """
-    videos = scrape_generic_video_list_page(request.url.replace(f"{BASE_URL}/", "").strip('/'), 1) # Attempt to guess section and page=1, simplified. Or call directly based on structure?
-    # Reverting to original input_file_0 logic which scrapes ANY URL structure
-    # and specifically finds .b-thumb-item. It was more general purpose.
-    # The scrape_generic_video_list_page is specific to /section/page structure.
-    # Let's restore the general purpose scraper function for this endpoint.
-
+    # Uses the original input_file_0 logic, which scrapes ANY URL structure and specifically
+    # finds .b-thumb-item; scrape_generic_video_list_page is specific to the /section/page structure.
     logger.info(f"Attempting to scrape videos from generic URL: {request.url}")
-    try:
-        response = requests.get(request.url, headers=HEADERS, timeout=10)
-        response.raise_for_status()
-    except requests.exceptions.RequestException as e:
-         raise HTTPException(status_code=500, detail=f"Error fetching URL {request.url}: {str(e)}")
+    tree = await safe_scrape_tree(request.url, timeout=10) # This raises HTTPException on failure
 
-    soup = BeautifulSoup(response.text, "html.parser")
     # Find any thumb items that might be video items (excludes channel/star/cat specific classes)
-    video_items = soup.find_all("div", class_="b-thumb-item js-thumb-item js-thumb") # Based on input_file_0
-
-    videos = []
-    for item in video_items:
-        if "random-thumb" in item.get("class", []):
-            continue # Skip ads or random suggestions
-
-        # --- Extract data - replicating logic from original scrape_videos ---
-        title_elem = item.find("div", class_="b-thumb-item__title js-gallery-title")
-        title = title_elem.get_text(strip=True) if title_elem else None
-        title_attribute = title # Initial assumption, will be overridden by link tag title if available
-
-        duration_elem = item.find("div", class_="b-thumb-item__duration")
-        duration_span = duration_elem.find("span") if duration_elem else None
-        duration = duration_span.get_text(strip=True) if duration_span else None
+    # Ads and random suggestions (random-thumb) are filtered out by the XPath itself
+    video_items = JS_THUMB_ITEMS_XPATH(tree) # Based on input_file_0
 
-        image_urls_data = extract_image_urls(item) # Use helper
-
-        link = None
-        gallery_id = None
-        thumb_id = None
-        preview_video_url = None
-        link_elem = item.find("a", class_="js-gallery-stats js-gallery-link")
-        if link_elem:
-            href = link_elem.get("href")
-            # Original added hqporn.xxx if relative link. Be cautious if URL isn't from base.
-            # Assume internal relative link needs BASE_URL prepended.
-            link = f"{BASE_URL}{href}" if href and href.startswith('/') else href
-            gallery_id = link_elem.get("data-gallery-id")
-            thumb_id = link_elem.get("data-thumb-id")
-            preview_video_url = link_elem.get("data-preview")
-            link_title_attribute = link_elem.get("title")
-            if link_title_attribute:
-                title_attribute = link_title_attribute # Use the title from the link tag if available
-
-        # Final decision on video title
-        if not title: # If title was missing from the specific title div
-             title = title_attribute # Use link tag title
-
-        # Extract tags
-        categories_elem = item.find("div", class_="b-thumb-item__detail")
-        tags = []
-        if categories_elem:
-            tag_links = categories_elem.find_all("a")
-            tags = [
-                Tag(
-                    link=f"{BASE_URL}{link_a['href']}" if link_a.get('href', '').startswith('/') else link_a.get('href'),
-                    name=link_a.get_text(strip=True)
-                )
-                for link_a in tag_links if link_a.get('href') and link_a.get_text(strip=True)
-            ]
-
-        # Ensure minimum data before creating model
-        if link or title:
-            video = VideoData(
-                duration=duration,
-                gallery_id=gallery_id,
-                image_urls=image_urls_data,
-                link=link,
-                preview_video_url=preview_video_url,
-                tags=tags,
-                thumb_id=thumb_id,
-                title=title,
-                title_attribute=title_attribute # Include attribute for completeness
-            )
-            videos.append(video)
-        else:
-            logger.warning(f"Skipping item scraped from {request.url} due to missing link/title: {item.prettify()}")
+    videos = await run_parse(parse_thumb_items, video_items, request.url)
 
     if not videos:
         # Check if it's a gallery list page but empty, or potentially a non-list page
-        if not soup.find('div', id='galleries') and not soup.find_all("div", class_="b-thumb-item"):
+        if first(ANY_GALLERIES_XPATH(tree)) is None and first(ANY_THUMB_ITEM_XPATH(tree)) is None:
             raise HTTPException(status_code=404, detail="The provided URL does not appear to be a recognizable video listing page.")
         else:
              # It is a listing page but found no items
@@ -719,19 +1056,29 @@ async def scrape_videos_endpoint(request: ScrapeRequest):
     return videos
 
 
+@app.get("/api/fresh", response_model=List[VideoData], summary="Get Several Fresh Videos Pages")
+async def get_fresh_pages(
+    start: int = Query(1, description="The first page number (must be > 0)", gt=0),
+    count: int = Query(5, description=f"How many consecutive pages to fetch (at most {MAX_BATCH_PAGES})", gt=0)
+):
+    """Retrieve several consecutive '/fresh' pages concurrently, returning their videos in page order
+    up to the first page that doesn't exist."""
+    page_numbers = batch_page_numbers(start, count)
+    return await scrape_pages(functools.partial(scrape_generic_video_list_page, "fresh"), page_numbers)
+
 @app.get("/api/fresh/{page_number}", response_model=List[VideoData], summary="Get Fresh Videos Page")
 async def get_fresh_page(
     page_number: int = Path(..., description="The page number (must be > 0)", gt=0)
 ):
     """Retrieve videos from the '/fresh' section by page number."""
-    return scrape_generic_video_list_page(section="fresh", page_number=page_number)
+    return await scrape_generic_video_list_page(section="fresh", page_number=page_number)
 
 @app.get("/api/best/{page_number}", response_model=List[VideoData], summary="Get Best Rated Videos Page")
 async def get_best_rated_page(
      page_number: int = Path(..., description="The page number (must be > 0)", gt=0)
 ):
     """Retrieve videos from the '/best' section by page number."""
-    return scrape_generic_video_list_page(section="best", page_number=page_number)
+    return await scrape_generic_video_list_page(section="best", page_number=page_number)
 
 
 @app.get("/api/trend/{page_number}", response_model=List[VideoData], summary="Get Trending Videos Page")
@@ -740,7 +1087,20 @@ async def get_trend_page(
 ):
     """Retrieve videos from the '/trend' section by page number."""
     # Note: This uses a potentially different URL structure based on observation from input_file_8
-    return scrape_generic_video_list_page(section="trend", page_number=page_number)
+    return await scrape_generic_video_list_page(section="trend", page_number=page_number)
+
+@app.get("/api/search/{search_content}", response_model=List[VideoData], summary="Search Videos Across Several Pages")
+async def get_search_results_pages(
+    search_content: str = Path(..., description="The search query."),
+    start: int = Query(1, description="The first page number (must be > 0)", gt=0),
+    count: int = Query(5, description=f"How many consecutive pages to fetch (at most {MAX_BATCH_PAGES})", gt=0)
+):
+    """Search for videos and retrieve several consecutive result pages concurrently, in page order
+    up to the first page that doesn't exist."""
+    if not search_content:
+        raise HTTPException(status_code=400, detail="Search content cannot be empty.")
+    page_numbers = batch_page_numbers(start, count)
+    return await scrape_pages(functools.partial(scrape_search_page, search_content), page_numbers)
 
 @app.get("/api/search/{search_content}/{page_number}", response_model=List[VideoData], summary="Search Videos")
 async def get_search_results_page(
@@ -750,7 +1110,7 @@ async def get_search_results_page(
     """Search for videos using a query and retrieve results by page number."""
     if not search_content:
         raise HTTPException(status_code=400, detail="Search content cannot be empty.")
-    return scrape_search_page(search_content=search_content, page_number=page_number)
+    return await scrape_search_page(search_content=search_content, page_number=page_number)
 
 
 @app.get("/api/categories/{page_number}", response_model=List[CategoryData], summary="Get Categories Page")
@@ -758,7 +1118,7 @@ async def get_categories_page(
      page_number: int = Path(..., description="The page number (must be > 0)", gt=0)
 ):
     """Retrieve categories from the '/categories' section by page number."""
-    return scrape_category_list_page(page_number=page_number)
+    return await scrape_category_list_page(page_number=page_number)
 
 
 @app.get("/api/pornstars/{page_number}", response_model=List[PornstarData], summary="Get Pornstars Page")
@@ -766,7 +1126,7 @@ async def get_pornstars_page(
      page_number: int = Path(..., description="The page number (must be > 0)", gt=0)
 ):
     """Retrieve pornstars from the '/pornstars' section by page number."""
-    return scrape_pornstar_list_page(page_number=page_number)
+    return await scrape_pornstar_list_page(page_number=page_number)
 
 
 @app.get("/api/channels/{page_number}", response_model=List[ChannelData], summary="Get Channels Page")
@@ -774,15 +1134,15 @@ async def get_channels_page(
      page_number: int = Path(..., description="The page number (must be > 0)", gt=0)
 ):
     """Retrieve channels from the '/channels' section by page number."""
-    return scrape_channel_list_page(page_number=page_number)
+    return await scrape_channel_list_page(page_number=page_number)
 
 @app.get("/api/stream/{video_page_link:path}", response_model=StreamData, summary="Get Stream Links for a Video Page")
 async def get_stream_links(
     # Using ':path' allows this variable to contain '/' characters
-    video_page_link: str = Path(..., description="The full URL of the video page to scrape for stream links (e.g., https://hqporn.xxx/video-title_123.html). Must start with http.")
+    video_page_link: str = Path(..., description="The full URL of the video page to scrape for stream links (e.g., https://hqporn.xxx/video-title_123.html). Must be a video page on the site.")
 ):
     """Scrape a specific video playback page for its direct streaming links."""
-    return scrape_video_stream_data(video_page_url=video_page_link)
+    return await scrape_video_stream_data(video_page_url=video_page_link)
 
 
 # --- Main execution block for running with uvicorn ---
@@ -792,4 +1152,10 @@ if __name__ == "__main__":
     # Use environment variable $PORT for Render deployment compatibility
     import os
     port = int(os.environ.get("PORT", 8000)) # Default to 8000 if PORT env var not set
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    workers = int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 1))
+    # Multiple workers need the app as an import string; uvloop and httptools come with uvicorn[standard].
+    # Each worker keeps its own page caches.
+    uvicorn.run(
+        "app1:app", host="0.0.0.0", port=port, workers=workers,
+        loop="uvloop", http="httptools", access_log=False,
+    )
@@ -0,0 +1,18 @@
+# etags.py
+# Conditional request helpers shared by app.py and app1.py
+
+from typing import Optional
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header value matches `etag`, using the weak comparison RFC 9110 prescribes for it:
+    the header is a comma-separated list of entity tags (or '*', which matches any representation), and
+    a W/ prefix on either side is ignored."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    etag = etag.removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        if candidate.strip().removeprefix("W/") == etag:
+            return True
+    return False
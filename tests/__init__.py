@@ -0,0 +1,4 @@
+import logging
+
+# Both apps log every fetch; keep test output to failures and errors
+logging.disable(logging.WARNING)
@@ -0,0 +1,128 @@
+"""HTML fixtures and a fake upstream site shared by the app and app1 tests."""
+
+import json
+import os
+
+import httpx
+
+BASE_URL = "https://hqporn.xxx"
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+
+def load_expected(name: str) -> dict:
+    """Responses the baseline scrapers gave for the fixtures below, by endpoint. Tests that expect a deliberate
+    change from the baseline apply it on top of these."""
+    with open(os.path.join(DATA_DIR, f"{name}_expected.json")) as f:
+        return json.load(f)
+
+def thumb(i: int, extra: str = "") -> str:
+    return f'''
+<div class="b-thumb-item js-thumb-item js-thumb{extra}">
+  <a class="js-gallery-link js-gallery-stats" href="/video-{i}.html" data-gallery-id="g{i}" data-thumb-id="t{i}" data-preview="https://cdn.x/p{i}.mp4" title="Video  title {i}">
+    <picture class="js-gallery-img">
+      <source type="image/webp" srcset="https://cdn.x/{i}.webp 1x">
+      <source type="image/jpeg" srcset="https://cdn.x/{i}.jpg 1x">
+      <img data-src="https://cdn.x/{i}-lazy.jpg" src="/blank.gif">
+    </picture>
+    <div class="b-thumb-item__duration"><span> 1{i}:00 </span></div>
+  </a>
+  <div class="b-thumb-item__title js-gallery-title">Title {i}</div>
+  <div class="b-thumb-item__detail"><a href="/categories/tag{i}/">Tag{i}</a><a href="https://other.x/t">Ext</a><a href="">empty</a></div>
+</div>'''
+
+# A video listing: two regular items, a random-thumb ad, and three incomplete items
+LISTING = (
+    '<html><head><meta charset="utf-8"><title>x</title></head><body><div class="nav">nav</div>'
+    '<div id="galleries" class="b-gallery js-gallery-list">'
+    + thumb(1) + thumb(2, " random-thumb") + thumb(3) +
+    '<div class="b-thumb-item"><div class="b-thumb-item__title"></div></div>'
+    '<div class="b-thumb-item"><a class="js-gallery-stats" href="/stats-only.html" data-gallery-id="gs"><picture><img src="/plain.jpg"></picture></a>'
+    '<div class="b-thumb-item__duration"><span></span></div><div class="b-thumb-item__detail"><a href="/t/x/"> <b>Nested</b> tag </a></div></div>'
+    '<div class="b-thumb-item"><div class="b-thumb-item__title">  </div><a href="/x" class="other">no</a></div>'
+    '</div><footer>f</footer></body></html>'
+)
+
+NO_RESULTS = '<html><body><div class="b-catalog-info-descr">No results found for query</div></body></html>'
+
+def card(kind: str, i: int, span: bool = False) -> str:
+    name = f"<span>Longer {kind} name {i}</span>" if span else f"Longer {kind} name {i}"
+    item_class = "b-thumb-item--star" if kind == "pornstar" else "b-thumb-item--cat"
+    return f'''<div class="b-thumb-item {item_class}">
+ <a class="js-{kind}-stats" href="/{kind}/{i}/" data-{kind}-id="{kind[0]}{i}" title=" {kind} {i} ">
+  <picture><source type="image/jpeg" srcset="https://cdn.x/{kind}{i}.jpg"><img src="https://cdn.x/{kind}{i}.jpg"></picture>
+ </a><div class="b-thumb-item__title">{name}</div></div>'''
+
+def cards(kind: str, list_class: str, span: bool = False) -> str:
+    return (f'<html><body><div id="galleries" class="b-gallery {list_class}">'
+            + card(kind, 1, span) + card(kind, 2, span)
+            + '<div class="b-thumb-item b-thumb-item--cat b-thumb-item--star"></div></div></body></html>')
+
+CATEGORIES = cards("category", "js-category-list")
+PORNSTARS = cards("pornstar", "js-pornstar-list")
+CHANNELS = cards("channel", "js-channel-list", span=True)
+
+PLAYER = (
+    '<div class="b-video-player"><video id="video_html5_api" src="https://cdn.x/main.mp4" poster="https://cdn.x/poster.jpg"'
+    ' data-preview="https://cdn.x/s1.jpg, https://cdn.x/s2.jpg ,, ">'
+    '<source src="https://cdn.x/main.mp4" type="video/mp4"><source src="https://cdn.x/720.mp4" type="video/mp4" size="720">'
+    '<source src="https://cdn.x/720.mp4" type="video/mp4" size="720"><source src="https://cdn.x/480.mp4" type="video/mp4" size="480">'
+    '</video></div>'
+)
+VIDEO = f'<html><body>{PLAYER}</body></html>'
+NO_VIDEO = '<html><body><div>nothing</div></body></html>'
+
+# An ad <video> ahead of the player, whose own <video> has no id
+DECOY_VIDEO = (
+    '<html><body><div class="b-ad"><video src="https://ads.x/ad.mp4"><source src="https://ads.x/ad.webm" type="video/webm"></video></div>'
+    '<div class="b-video-player b-video-player--wide"><video src="/m.mp4" poster="/p.jpg"><source src="/720.mp4" type="video/mp4" size="720"></video></div>'
+    '</body></html>'
+)
+# A player div without a <video> (e.g. a removed video) next to an ad <video>
+EMPTY_PLAYER = '<html><body><video src="https://ads.x/ad.mp4"></video><div class="b-video-player">Removed</div></body></html>'
+# A bare <video> (e.g. an ad or a preview clip) on a page without a player div
+BARE_VIDEO = '<html><body><p>text</p><video src="/bare.mp4"></video></body></html>'
+
+class FakeSite:
+    """Answers the scrapers' requests through an httpx.MockTransport and records them.
+
+    `pages` maps a URL path to an HTML body, an httpx.Response, or a callable taking the request and
+    returning either. Unknown paths get a 404."""
+
+    def __init__(self, pages: dict):
+        self.pages = dict(pages)
+        self.requests = []
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        page = self.pages.get(request.url.path)
+        if callable(page):
+            page = page(request)
+        if page is None:
+            return httpx.Response(404, text="not found")
+        if isinstance(page, httpx.Response):
+            return page
+        return httpx.Response(200, text=page, headers={"Content-Type": "text/html; charset=utf-8"})
+
+    def paths(self) -> list:
+        return [request.url.path for request in self.requests]
+
+    def client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=httpx.MockTransport(self.handle), follow_redirects=True)
+
+def default_site() -> FakeSite:
+    """A site serving the fixtures above at the paths the scrapers request."""
+    return FakeSite({
+        "/fresh/": LISTING,
+        "/fresh/2/": LISTING,
+        "/best/": LISTING,
+        "/trend/1": LISTING,
+        "/search/foo/": LISTING,
+        "/search/none/": NO_RESULTS,
+        "/categories/": CATEGORIES,
+        "/pornstars/": PORNSTARS,
+        "/channels/": CHANNELS,
+        "/video.html": VIDEO,
+        "/novideo.html": NO_VIDEO,
+        "/decoy.html": DECOY_VIDEO,
+        "/empty-player.html": EMPTY_PLAYER,
+        "/bare.html": BARE_VIDEO,
+    })
@@ -0,0 +1,295 @@
+"""Tests for app.py, run against the fixtures in tests/pages.py through a fake upstream site."""
+
+import asyncio
+import gc
+import unittest
+
+import httpx
+from fastapi.testclient import TestClient
+
+import app
+from tests import pages
+
+class AppTestCase(unittest.TestCase):
+    """Points app at a fresh FakeSite and empties its caches around every test."""
+
+    def setUp(self):
+        self.site = pages.default_site()
+        self.original_client = app.ASYNC_CLIENT
+        app.ASYNC_CLIENT = self.site.client()
+        self.clear_caches()
+        self.client = TestClient(app.app) # Used without `with`: the lifespan would replace ASYNC_CLIENT
+
+    def tearDown(self):
+        app.ASYNC_CLIENT = self.original_client
+        self.clear_caches()
+
+    def clear_caches(self):
+        for cache in (app.RESPONSE_CACHE, app.PAGE_CACHE, app.STREAM_CACHE, app.NEGATIVE_CACHE):
+            cache.clear()
+
+class AbsoluteUrlTests(unittest.TestCase):
+    """Scraped hrefs: site-relative paths get BASE_URL, protocol-relative ones its scheme, the rest is kept."""
+
+    def test_rule(self):
+        cases = {
+            "/video-1.html": "https://hqporn.xxx/video-1.html",
+            "//cdn.x/a.jpg": "https://cdn.x/a.jpg",
+            "https://other.x/t": "https://other.x/t",
+            "rel/path": "rel/path",
+            "": "",
+        }
+        for href, expected in cases.items():
+            self.assertEqual(app.absolute_url(href), expected, href)
+
+class ParserBaselineTests(AppTestCase):
+    """Each endpoint's output for the fixtures must match what the baseline scrapers returned."""
+
+    expected = pages.load_expected("app")
+
+    def assert_expected(self, name, response):
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), self.expected[name])
+
+    def test_video_listing(self):
+        self.assert_expected("listing", self.client.get("/api/fresh/1"))
+
+    def test_search(self):
+        self.assert_expected("listing", self.client.get("/api/search/foo/1"))
+
+    def test_search_without_results(self):
+        response = self.client.get("/api/search/none/1")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [])
+
+    def test_categories(self):
+        self.assert_expected("categories", self.client.get("/api/categories/1"))
+
+    def test_pornstars(self):
+        self.assert_expected("pornstars", self.client.get("/api/pornstars/1"))
+
+    def test_channels(self):
+        self.assert_expected("channels", self.client.get("/api/channels/1"))
+
+    def test_stream(self):
+        self.assert_expected("stream", self.client.get(f"/api/stream/{pages.BASE_URL}/video.html"))
+
+    def test_stream_without_player(self):
+        self.assertEqual(self.client.get(f"/api/stream/{pages.BASE_URL}/novideo.html").status_code, 404)
+
+    def test_scrape(self):
+        self.assert_expected("scrape", self.client.get("/scrape", params={"url": f"{pages.BASE_URL}/fresh/"}))
+
+    def test_scrape_videos(self):
+        self.assert_expected("scrape_videos", self.client.post("/scrape-videos", json={"url": f"{pages.BASE_URL}/fresh/"}))
+
+class ResponseCacheTests(AppTestCase):
+    """Cached response bodies never outlive the scrape results they were built from."""
+
+    def age_page_cache(self, seconds_left):
+        now = app.PAGE_CACHE.timer()
+        for key, (expires, result) in list(app.PAGE_CACHE.items()):
+            app.PAGE_CACHE[key] = (now + seconds_left, result)
+
+    def max_age(self, response):
+        return int(response.headers["Cache-Control"].rpartition("max-age=")[2])
+
+    def test_fresh_result_gets_full_max_age(self):
+        response = self.client.get("/api/fresh/1")
+        self.assertIn(self.max_age(response), (app.PAGE_TTL - 1, app.PAGE_TTL))
+
+    def test_response_expires_with_the_cached_result(self):
+        self.client.get("/api/fresh/1")
+        self.age_page_cache(10)
+        app.RESPONSE_CACHE.clear()
+
+        response = self.client.get("/api/fresh/1")
+        self.assertLessEqual(self.max_age(response), 10)
+        (_, _, _, expires), = app.RESPONSE_CACHE.values()
+        self.assertLessEqual(expires, app.RESPONSE_CACHE.timer() + 10)
+        self.assertLessEqual(self.max_age(self.client.get("/api/fresh/1")), 10) # Served from RESPONSE_CACHE
+        self.assertEqual(self.site.paths(), ["/fresh/"])
+
+    def test_batch_expires_with_its_oldest_page(self):
+        self.client.get("/api/fresh/1")
+        self.age_page_cache(5)
+        response = self.client.get("/api/fresh/batch?pages=1,2")
+        self.assertLessEqual(self.max_age(response), 5)
+
+class ConditionalResponseTests(AppTestCase):
+    """Responses carry an ETag, and If-None-Match is compared tag by tag."""
+
+    def test_matching_etag_gets_304(self):
+        etag = self.client.get("/api/fresh/1").headers["ETag"]
+        for if_none_match in (etag, f'"other", W/{etag}', "*"):
+            response = self.client.get("/api/fresh/1", headers={"If-None-Match": if_none_match})
+            self.assertEqual(response.status_code, 304, if_none_match)
+            self.assertEqual(response.headers["ETag"], etag)
+            self.assertEqual(response.content, b"")
+
+    def test_other_etag_gets_body(self):
+        etag = self.client.get("/api/fresh/1").headers["ETag"]
+        response = self.client.get("/api/fresh/1", headers={"If-None-Match": f'"x", {etag}-old'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["ETag"], etag)
+
+class CacheFlushTests(AppTestCase):
+    """POST /api/cache/flush is only available with the ADMIN_TOKEN secret."""
+
+    def setUp(self):
+        super().setUp()
+        self.original_token = app.ADMIN_TOKEN
+        self.client.get("/api/fresh/1")
+
+    def tearDown(self):
+        app.ADMIN_TOKEN = self.original_token
+        super().tearDown()
+
+    def test_disabled_without_configured_token(self):
+        app.ADMIN_TOKEN = None
+        self.assertEqual(self.client.post("/api/cache/flush", headers={"X-Admin-Token": ""}).status_code, 404)
+        self.assertEqual(len(app.PAGE_CACHE), 1)
+
+    def test_rejects_missing_or_wrong_token(self):
+        app.ADMIN_TOKEN = "s3cret"
+        self.assertEqual(self.client.post("/api/cache/flush").status_code, 403)
+        self.assertEqual(self.client.post("/api/cache/flush", headers={"X-Admin-Token": "guess"}).status_code, 403)
+        self.assertEqual(len(app.PAGE_CACHE), 1)
+
+    def test_flushes_with_token(self):
+        app.ADMIN_TOKEN = "s3cret"
+        response = self.client.post("/api/cache/flush", headers={"X-Admin-Token": "s3cret"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"flushed": 2}) # The page result and its response body
+        self.assertEqual(len(app.PAGE_CACHE), 0)
+
+class BatchTests(AppTestCase):
+    """/api/fresh/batch returns the pages up to the first missing one; other upstream errors fail the batch."""
+
+    def setUp(self):
+        super().setUp()
+        del self.site.pages["/fresh/2/"]
+        self.site.pages["/fresh/3/"] = pages.LISTING
+        self.page_items = len(ParserBaselineTests.expected["listing"])
+
+    def test_stops_at_first_missing_page(self):
+        response = self.client.get("/api/fresh/batch?pages=1,2,3")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), self.page_items)
+
+    def test_missing_first_page_gives_empty_batch(self):
+        response = self.client.get("/api/fresh/batch?pages=2,3")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [])
+
+    def test_other_errors_fail_the_batch(self):
+        self.site.pages["/fresh/3/"] = lambda request: httpx.Response(500)
+        self.assertEqual(self.client.get("/api/fresh/batch?pages=1,3").status_code, 500)
+
+    def test_missing_single_page_is_not_found(self):
+        self.assertEqual(self.client.get("/api/fresh/2").status_code, 404)
+        self.assertEqual(self.client.get("/api/fresh/2").status_code, 404) # From NEGATIVE_CACHE
+        self.assertEqual(self.site.paths(), ["/fresh/2/"])
+
+class HeadTests(AppTestCase):
+    """HEAD /api requests get the headers of the equivalent GET and no body, on cache misses, hits and errors."""
+
+    def call(self, method, path):
+        """Runs one request through the ASGI app; returns its scope, status, headers and body as sent."""
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "scheme": "http", "method": method,
+            "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+            "headers": [(b"host", b"testserver"), (b"accept-encoding", b"gzip")],
+            "client": ("127.0.0.1", 1234), "server": ("testserver", 80),
+        }
+        messages = []
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+        async def send(message):
+            messages.append(message)
+        asyncio.run(app.app(scope, receive, send))
+        start, bodies = messages[0], messages[1:]
+        return scope, start["status"], dict(start["headers"]), b"".join(m.get("body", b"") for m in bodies)
+
+    def test_head_on_cache_miss_matches_get(self):
+        scope, status, head_headers, body = self.call("HEAD", "/api/fresh/1")
+        self.assertEqual((status, body), (200, b""))
+        self.assertEqual(scope["method"], "HEAD") # The request's own scope is left alone
+        _, _, get_headers, get_body = self.call("GET", "/api/fresh/1")
+        self.assertEqual(get_headers[b"content-encoding"], b"gzip")
+        self.assertEqual(head_headers, get_headers)
+        self.assertEqual(int(get_headers[b"content-length"]), len(get_body))
+
+    def test_head_on_cache_hit_matches_get(self):
+        _, _, get_headers, _ = self.call("GET", "/api/fresh/1")
+        _, status, head_headers, body = self.call("HEAD", "/api/fresh/1")
+        self.assertEqual((status, body), (200, b""))
+        self.assertEqual(head_headers, get_headers)
+        self.assertEqual(self.site.paths(), ["/fresh/"])
+
+    def test_head_error_has_no_body(self):
+        _, status, head_headers, body = self.call("HEAD", "/api/stream/https://hqporn.xxx/novideo.html")
+        self.assertEqual((status, body), (404, b""))
+        _, _, get_headers, get_body = self.call("GET", "/api/stream/https://hqporn.xxx/novideo.html")
+        self.assertNotEqual(get_body, b"")
+        self.assertEqual(head_headers, get_headers)
+
+class StreamPlayerTests(AppTestCase):
+    """The stream scraper reads the <video> inside div.b-video-player, not the first <video> on the page."""
+
+    def get_stream(self, path):
+        return self.client.get(f"/api/stream/{pages.BASE_URL}{path}")
+
+    def test_decoy_video_before_player_is_ignored(self):
+        response = self.get_stream("/decoy.html")
+        self.assertEqual(response.status_code, 200)
+        stream = response.json()
+        self.assertEqual(stream["main_video_src"], "/m.mp4")
+        self.assertEqual(stream["poster_image"], "/p.jpg")
+        self.assertEqual(stream["source_tags"], [{"src": "/720.mp4", "type": "video/mp4", "size": "720"}])
+
+    def test_player_without_video_is_not_found(self):
+        self.assertEqual(self.get_stream("/empty-player.html").status_code, 404)
+
+    def test_bare_video_without_player(self):
+        self.assertEqual(self.get_stream("/bare.html").status_code, 404)
+
+class SingleFlightTests(AppTestCase):
+    """ttl_cached shares one in-flight scrape per key between concurrent callers."""
+
+    def test_concurrent_callers_share_one_fetch(self):
+        async def scenario():
+            return await asyncio.gather(*(app.scrape_generic_video_list_page("fresh", 1) for _ in range(5)))
+
+        results = asyncio.run(scenario())
+        self.assertEqual(self.site.paths(), ["/fresh/"])
+        self.assertEqual(app.IN_FLIGHT, {})
+        self.assertTrue(all(result == results[0] for result in results))
+        self.assertEqual(len({id(result) for result in results}), 5) # Each caller gets its own copy
+
+    def test_failure_after_all_callers_cancelled_is_retrieved(self):
+        async def scenario():
+            loop = asyncio.get_running_loop()
+            reported = []
+            loop.set_exception_handler(lambda loop, context: reported.append(context))
+            release = asyncio.Event()
+
+            @app.ttl_cached(app.PAGE_CACHE)
+            async def failing_scrape(page_number):
+                await release.wait()
+                raise RuntimeError("upstream went away")
+
+            caller = asyncio.ensure_future(failing_scrape(1))
+            await asyncio.sleep(0)
+            caller.cancel()
+            await asyncio.gather(caller, return_exceptions=True)
+            release.set()
+            await asyncio.sleep(0.01)
+            self.assertEqual(app.IN_FLIGHT, {})
+            gc.collect() # Unretrieved task exceptions are reported when the task is collected
+            return reported
+
+        self.assertEqual(asyncio.run(scenario()), [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,327 @@
+"""Tests for app1.py, run against the fixtures in tests/pages.py through a fake upstream site."""
+
+import asyncio
+import gc
+import threading
+import unittest
+from unittest import mock
+
+import httpx
+from fastapi.testclient import TestClient
+
+import app1
+from tests import pages
+
+class App1TestCase(unittest.TestCase):
+    """Points app1 at a fresh FakeSite and empties its caches around every test."""
+
+    def setUp(self):
+        self.site = pages.default_site()
+        self.original_client = app1.CLIENT
+        app1.CLIENT = self.site.client()
+        self.clear_caches()
+        self.client = TestClient(app1.app) # Used without `with`: the lifespan would replace CLIENT
+
+    def tearDown(self):
+        app1.CLIENT = self.original_client
+        self.clear_caches()
+
+    def clear_caches(self):
+        for cache in (app1.RESPONSE_CACHE, app1.PAGE_CACHE, app1.VALIDATED_RESULTS):
+            cache.clear()
+
+class AbsoluteUrlTests(unittest.TestCase):
+    """Scraped hrefs: site-relative paths get BASE_URL, protocol-relative ones its scheme, the rest is kept."""
+
+    def test_rule(self):
+        cases = {
+            "/video-1.html": "https://hqporn.xxx/video-1.html",
+            "//cdn.x/a.jpg": "https://cdn.x/a.jpg",
+            "https://other.x/t": "https://other.x/t",
+            "rel/path": "rel/path",
+            "": "",
+        }
+        for href, expected in cases.items():
+            self.assertEqual(app1.absolute_url(href), expected, href)
+
+class ParserBaselineTests(App1TestCase):
+    """Each endpoint's output for the fixtures must match what the baseline scrapers returned, except where
+    a change meant to differ (see test_scrape_videos)."""
+
+    expected = pages.load_expected("app1")
+
+    def assert_expected(self, name, response):
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), self.expected[name])
+
+    def test_video_listing(self):
+        self.assert_expected("listing", self.client.get("/api/fresh/1"))
+
+    def test_search(self):
+        self.assert_expected("listing", self.client.get("/api/search/foo/1"))
+
+    def test_search_without_results(self):
+        response = self.client.get("/api/search/none/1")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [])
+
+    def test_categories(self):
+        self.assert_expected("categories", self.client.get("/api/categories/1"))
+
+    def test_pornstars(self):
+        self.assert_expected("pornstars", self.client.get("/api/pornstars/1"))
+
+    def test_channels(self):
+        self.assert_expected("channels", self.client.get("/api/channels/1"))
+
+    def test_stream(self):
+        self.assert_expected("stream", self.client.get(f"/api/stream/{pages.BASE_URL}/video.html"))
+
+    def test_stream_without_player(self):
+        self.assertEqual(self.client.get(f"/api/stream/{pages.BASE_URL}/novideo.html").status_code, 404)
+
+    def test_scrape_videos(self):
+        # The baseline never found an item's gallery link, whose class list it matched as one exact string. The
+        # class-token XPath finds it, so link, ids and preview are filled and title_attribute is the link's title.
+        expected = [
+            {
+                **item,
+                "link": f"{pages.BASE_URL}/video-{i}.html",
+                "gallery_id": f"g{i}",
+                "thumb_id": f"t{i}",
+                "preview_video_url": f"https://cdn.x/p{i}.mp4",
+                "title_attribute": f"Video  title {i}",
+            }
+            for i, item in zip((1, 3), self.expected["scrape_videos"])
+        ]
+        response = self.client.post("/scrape-videos", json={"url": f"{pages.BASE_URL}/fresh/"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), expected)
+
+class BatchTests(App1TestCase):
+    """Batch endpoints return the pages up to the first missing one; other upstream errors fail the batch."""
+
+    def setUp(self):
+        super().setUp()
+        del self.site.pages["/fresh/2/"]
+        self.site.pages["/fresh/3/"] = pages.LISTING
+        self.page_items = len(ParserBaselineTests.expected["listing"])
+
+    def test_stops_at_first_missing_page(self):
+        response = self.client.get("/api/fresh?start=1&count=3")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), self.page_items)
+
+    def test_missing_first_page_gives_empty_batch(self):
+        response = self.client.get("/api/fresh?start=2&count=2")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [])
+
+    def test_search_past_last_page(self):
+        response = self.client.get("/api/search/foo?start=1&count=3")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), self.page_items)
+
+    def test_other_errors_fail_the_batch(self):
+        self.site.pages["/fresh/2/"] = lambda request: httpx.Response(500)
+        self.assertEqual(self.client.get("/api/fresh?start=1&count=3").status_code, 500)
+
+    def test_missing_single_page_is_not_found(self):
+        self.assertEqual(self.client.get("/api/fresh/2").status_code, 404)
+
+class StreamPlayerTests(App1TestCase):
+    """The stream scraper reads the <video> inside div.b-video-player, not the first <video> on the page."""
+
+    def get_stream(self, path):
+        return self.client.get(f"/api/stream/{pages.BASE_URL}{path}")
+
+    def test_decoy_video_before_player_is_ignored(self):
+        response = self.get_stream("/decoy.html")
+        self.assertEqual(response.status_code, 200)
+        stream = response.json()
+        self.assertEqual(stream["main_video_src"], "/m.mp4")
+        self.assertEqual(stream["poster_image"], "/p.jpg")
+        self.assertEqual(stream["source_tags"], [{"src": "/720.mp4", "type": "video/mp4", "size": "720"}])
+
+    def test_player_without_video_is_not_found(self):
+        self.assertEqual(self.get_stream("/empty-player.html").status_code, 404)
+
+    def test_bare_video_without_player(self):
+        self.assertEqual(self.get_stream("/bare.html").status_code, 404)
+
+class ResponseCacheTests(App1TestCase):
+    """Cached response bodies never outlive the scrape results they were built from."""
+
+    def age_page_cache(self, seconds_left):
+        now = app1.PAGE_CACHE.timer()
+        for key, (expires, result) in list(app1.PAGE_CACHE.items()):
+            app1.PAGE_CACHE[key] = (now + seconds_left, result)
+
+    def max_age(self, response):
+        return int(response.headers["Cache-Control"].rpartition("max-age=")[2])
+
+    def test_fresh_result_gets_full_max_age(self):
+        response = self.client.get("/api/fresh/1")
+        self.assertIn(self.max_age(response), (app1.PAGE_TTL - 1, app1.PAGE_TTL))
+
+    def test_response_expires_with_the_cached_result(self):
+        self.client.get("/api/fresh/1")
+        self.age_page_cache(10)
+        app1.RESPONSE_CACHE.clear()
+
+        response = self.client.get("/api/fresh/1")
+        self.assertLessEqual(self.max_age(response), 10)
+        (_, _, _, expires), = app1.RESPONSE_CACHE.values()
+        self.assertLessEqual(expires, app1.RESPONSE_CACHE.timer() + 10)
+        self.assertLessEqual(self.max_age(self.client.get("/api/fresh/1")), 10) # Served from RESPONSE_CACHE
+        self.assertEqual(self.site.paths(), ["/fresh/"])
+
+    def test_batch_expires_with_its_oldest_page(self):
+        self.client.get("/api/fresh/1")
+        self.age_page_cache(5)
+        response = self.client.get("/api/fresh?start=1&count=2")
+        self.assertLessEqual(self.max_age(response), 5)
+
+class ScrapeVideosTests(App1TestCase):
+    """POST /scrape-videos fetches through fetch_and_parse and parses off the event loop."""
+
+    def test_trees_are_parsed_on_the_parse_pool(self):
+        threads = []
+        def feed_tree(*args):
+            threads.append(threading.current_thread())
+            return original_feed_tree(*args)
+        original_feed_tree = app1.feed_tree
+        with mock.patch.object(app1, "feed_tree", feed_tree):
+            response = self.client.post("/scrape-videos", json={"url": f"{pages.BASE_URL}/fresh/"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(threads), 1)
+        self.assertTrue(threads[0].name.startswith("ThreadPoolExecutor"))
+
+    def test_body_is_parsed_as_it_streams_in(self):
+        body = pages.LISTING.replace("<footer>", "<!--" + "x" * 200_000 + "--><footer>").encode()
+        events = []
+        class Parser(app1.lxml_html.HTMLParser):
+            def feed(self, data):
+                events.append("fed")
+                return super().feed(data)
+
+        async def stream():
+            for start in range(0, len(body), 65536):
+                events.append("received")
+                yield body[start:start + 65536]
+                await asyncio.sleep(0.01)
+
+        async def scenario():
+            return await app1.read_tree(httpx.Response(200, content=stream(), headers={"Content-Type": "text/html"}))
+
+        with mock.patch.object(app1.lxml_html, "HTMLParser", Parser):
+            tree = asyncio.run(scenario())
+        self.assertEqual(events.count("fed"), 4)
+        self.assertLess(events.index("fed"), len(events) - 1 - events[::-1].index("received")) # Before the last chunk
+        self.assertEqual(len(app1.JS_THUMB_ITEMS_XPATH(tree)), 2)
+
+    def test_fetch_errors_are_mapped(self):
+        self.site.pages["/broken/"] = lambda request: httpx.Response(500)
+        response = self.client.post("/scrape-videos", json={"url": f"{pages.BASE_URL}/broken/"})
+        self.assertEqual(response.status_code, 500)
+        self.assertTrue(response.json()["detail"].startswith("Failed to fetch or parse URL"))
+
+    def test_unexpected_errors_are_mapped(self):
+        def fail(request):
+            raise ValueError("boom")
+        self.site.pages["/odd/"] = fail
+        response = self.client.post("/scrape-videos", json={"url": f"{pages.BASE_URL}/odd/"})
+        self.assertEqual(response.status_code, 500)
+        self.assertIn("boom", response.json()["detail"])
+
+class ConditionalResponseTests(App1TestCase):
+    """Responses carry an ETag, and If-None-Match is compared tag by tag."""
+
+    def test_matching_etag_gets_304(self):
+        etag = self.client.get("/api/fresh/1").headers["ETag"]
+        for if_none_match in (etag, f'"other", W/{etag}', "*"):
+            response = self.client.get("/api/fresh/1", headers={"If-None-Match": if_none_match})
+            self.assertEqual(response.status_code, 304, if_none_match)
+            self.assertEqual(response.headers["ETag"], etag)
+            self.assertEqual(response.content, b"")
+
+    def test_other_etag_gets_body(self):
+        etag = self.client.get("/api/fresh/1").headers["ETag"]
+        response = self.client.get("/api/fresh/1", headers={"If-None-Match": f'"x", {etag}-old'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["ETag"], etag)
+
+class ConditionalGetTests(App1TestCase):
+    """Expired listings are revalidated with the site's ETag; a 304 serves the previously scraped result."""
+
+    def setUp(self):
+        super().setUp()
+        self.site.pages["/fresh/"] = self.etag_page
+
+    def etag_page(self, request):
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304, headers={"ETag": '"v1"'})
+        return httpx.Response(200, text=pages.LISTING, headers={"ETag": '"v1"', "Content-Type": "text/html"})
+
+    def test_not_modified_reuses_scraped_result(self):
+        first = self.client.get("/api/fresh/1").json()
+        app1.PAGE_CACHE.clear()
+        app1.RESPONSE_CACHE.clear()
+        second = self.client.get("/api/fresh/1")
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.json(), first)
+        self.assertEqual([r.headers.get("If-None-Match") for r in self.site.requests], [None, '"v1"'])
+
+    def test_only_extracted_results_are_kept(self):
+        self.client.get("/api/fresh/1")
+        (validators, result), = app1.VALIDATED_RESULTS.values()
+        self.assertEqual(validators, {"If-None-Match": '"v1"'})
+        self.assertTrue(all(isinstance(video, app1.VideoData) for video in result))
+
+    def test_pages_without_validators_are_fetched_in_full(self):
+        self.client.get("/api/best/1")
+        app1.PAGE_CACHE.clear()
+        app1.RESPONSE_CACHE.clear()
+        self.client.get("/api/best/1")
+        self.assertEqual([r.headers.get("If-None-Match") for r in self.site.requests], [None, None])
+        self.assertEqual(len(app1.VALIDATED_RESULTS), 0)
+
+class SingleFlightTests(App1TestCase):
+    """ttl_cached shares one in-flight scrape per key between concurrent callers."""
+
+    def test_concurrent_callers_share_one_fetch(self):
+        async def scenario():
+            return await asyncio.gather(*(app1.scrape_generic_video_list_page("fresh", 1) for _ in range(5)))
+
+        results = asyncio.run(scenario())
+        self.assertEqual(self.site.paths(), ["/fresh/"])
+        self.assertEqual(app1.IN_FLIGHT, {})
+        self.assertTrue(all(result == results[0] for result in results))
+        self.assertEqual(len({id(result) for result in results}), 5) # Each caller gets its own copy
+
+    def test_failure_after_all_callers_cancelled_is_retrieved(self):
+        async def scenario():
+            loop = asyncio.get_running_loop()
+            reported = []
+            loop.set_exception_handler(lambda loop, context: reported.append(context))
+            release = asyncio.Event()
+
+            @app1.ttl_cached(app1.PAGE_CACHE)
+            async def failing_scrape(page_number):
+                await release.wait()
+                raise RuntimeError("upstream went away")
+
+            caller = asyncio.ensure_future(failing_scrape(1))
+            await asyncio.sleep(0)
+            caller.cancel()
+            await asyncio.gather(caller, return_exceptions=True)
+            release.set()
+            await asyncio.sleep(0.01)
+            self.assertEqual(app1.IN_FLIGHT, {})
+            gc.collect() # Unretrieved task exceptions are reported when the task is collected
+            return reported
+
+        self.assertEqual(asyncio.run(scenario()), [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,30 @@
+"""Tests for the If-None-Match matching shared by both apps."""
+
+import unittest
+
+from etags import etag_matches
+
+class EtagMatchesTests(unittest.TestCase):
+
+    def test_exact_tag(self):
+        self.assertTrue(etag_matches('"abc"', '"abc"'))
+
+    def test_missing_header(self):
+        self.assertFalse(etag_matches(None, '"abc"'))
+        self.assertFalse(etag_matches("", '"abc"'))
+
+    def test_list_with_whitespace_and_weak_tags(self):
+        self.assertTrue(etag_matches(' "x" ,W/"abc" ', '"abc"'))
+        self.assertTrue(etag_matches('"abc"', 'W/"abc"'))
+
+    def test_wildcard(self):
+        self.assertTrue(etag_matches("*", '"abc"'))
+        self.assertTrue(etag_matches(" * ", '"abc"'))
+
+    def test_substrings_do_not_match(self):
+        self.assertFalse(etag_matches('"abcd"', '"abc"'))
+        self.assertFalse(etag_matches('"x", "abc"x', '"abc"'))
+        self.assertFalse(etag_matches('abc', '"abc"'))
+
+if __name__ == "__main__":
+    unittest.main()